@@ -11,7 +11,7 @@ setup(
     license="MIT",
     packages=find_packages(exclude=[]),
     python_requires=">=3.6",
-    install_requires=["numpy>=1.11.0", "scipy>=0.17.0"],
+    install_requires=["numpy>=1.17.0", "scipy>=0.17.0"],
     classifiers=[
         "Programming Language :: Python :: 3",
         "Programming Language :: Python :: 3 :: Only",
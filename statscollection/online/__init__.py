@@ -25,7 +25,52 @@ The following classes are available for online computations on data streams, i.e
    ~statscollection.online.classes.Mean
    ~statscollection.online.classes.Min
    ~statscollection.online.classes.Max
+   ~statscollection.online.classes.Histogram
+   ~statscollection.online.multivariate.MultivariateMean
+   ~statscollection.online.multivariate.Covariance
+   ~statscollection.online.multivariate.OnlineRegression
+   ~statscollection.online.grouped.GroupedStatistic
    
+Several statistics may be fitted in a single pass over the data, and large
+arrays may be fitted in parallel processes.
+
+.. autosummary::
+   :nosignatures:
+   :toctree:
+
+   ~statscollection.online.classes.iterate_paralell
+   ~statscollection.online.parallel.parallel_fit
+   
+   
+Online algorithms for statistics over recent items.
+
+.. autosummary::
+   :nosignatures:
+   :toctree:
+
+   ~statscollection.online.window_statistics.ExponentialMean
+   ~statscollection.online.window_statistics.ExponentialVariance
+   ~statscollection.online.window_statistics.ExponentialMoments
+   ~statscollection.online.window_statistics.WindowedVariance
+   ~statscollection.online.window_statistics.WindowedCentralMoments
+   ~statscollection.online.window_statistics.WindowedMax
+   ~statscollection.online.window_statistics.WindowedMin
+   ~statscollection.online.window_statistics.WindowedRange
+   ~statscollection.online.window_statistics.RunningMedian
+   ~statscollection.online.window_statistics.WindowedQuantile
+   
+Sketches summarize data streams approximately, in bounded memory.
+
+.. autosummary::
+   :nosignatures:
+   :toctree:
+
+   ~statscollection.online.sketches.QuantileSketch
+   ~statscollection.online.sketches.DistinctCount
+   ~statscollection.online.sketches.CountMinSketch
+   ~statscollection.online.sketches.TopK
+   ~statscollection.online.sketches.BloomFilter
+   ~statscollection.online.sketches.CountingBloomFilter
    
 Online algorithms for sampling.
 
@@ -34,6 +79,7 @@ Online algorithms for sampling.
    :toctree:
 
    ~statscollection.online.sampling.Sample
+   ~statscollection.online.sampling.WeightedSample
    
 
 Tutorial
@@ -69,10 +115,61 @@ It's possible to...
 
 
 """
-from statscollection.online.classes import Mean, Max, Min
-from statscollection.online.sampling import Sample
+from statscollection.online.classes import Mean, Max, Min, Histogram, iterate_paralell
+from statscollection.online.grouped import GroupedStatistic
+from statscollection.online.multivariate import (
+    MultivariateMean,
+    Covariance,
+    OnlineRegression,
+)
+from statscollection.online.parallel import parallel_fit
+from statscollection.online.sampling import Sample, WeightedSample
+from statscollection.online.sketches import (
+    QuantileSketch,
+    DistinctCount,
+    CountMinSketch,
+    TopK,
+    BloomFilter,
+    CountingBloomFilter,
+)
+from statscollection.online.window_statistics import (
+    ExponentialMean,
+    ExponentialVariance,
+    ExponentialMoments,
+    WindowedVariance,
+    WindowedCentralMoments,
+    WindowedMax,
+    WindowedMin,
+    WindowedRange,
+    RunningMedian,
+    WindowedQuantile,
+)
 
 Mean = Mean
 Max = Max
 Min = Min
+Histogram = Histogram
+MultivariateMean = MultivariateMean
+Covariance = Covariance
+OnlineRegression = OnlineRegression
+GroupedStatistic = GroupedStatistic
+iterate_paralell = iterate_paralell
+parallel_fit = parallel_fit
 Sample = Sample
+WeightedSample = WeightedSample
+QuantileSketch = QuantileSketch
+DistinctCount = DistinctCount
+CountMinSketch = CountMinSketch
+TopK = TopK
+BloomFilter = BloomFilter
+CountingBloomFilter = CountingBloomFilter
+ExponentialMean = ExponentialMean
+ExponentialVariance = ExponentialVariance
+ExponentialMoments = ExponentialMoments
+WindowedVariance = WindowedVariance
+WindowedCentralMoments = WindowedCentralMoments
+WindowedMax = WindowedMax
+WindowedMin = WindowedMin
+WindowedRange = WindowedRange
+RunningMedian = RunningMedian
+WindowedQuantile = WindowedQuantile
@@ -5,10 +5,12 @@
 Abstract base classes. These are never initialized.
 """
 
-from collections import Iterable, Collection
+from collections.abc import Iterable, Collection
 from abc import ABC, abstractmethod
+import itertools
 import numpy as np
 import numbers
+import types
 
 
 class OnlineStatistic(ABC):
@@ -46,12 +48,25 @@ class OnlineStatistic(ABC):
 
     def _fit_collection(self, iterable):
         """
-        Fit a collection.
+        Fit a collection. NumPy arrays are passed on to the batch path.
         """
+        if isinstance(iterable, np.ndarray):
+            self._fit_array(iterable)
+            return None
+
         self_fit_item = self._fit_item
         for item in iterable:
             self_fit_item(item)
 
+    def _fit_array(self, array):
+        """
+        Fit a NumPy array. Subclasses override this with a vectorized kernel,
+        which reduces the array and folds the result into the running state.
+        """
+        self_fit_item = self._fit_item
+        for item in array:
+            self_fit_item(item)
+
     def _fit_iterable(self, iterable):
         """
         Fit an iterable by fitting every item sequentially.
@@ -61,20 +76,113 @@ class OnlineStatistic(ABC):
         for item in iterable:
             self_fit_item(item)
 
-    def yield_from(self, iterable):
+    def _fit_row(self, row):
+        """
+        Fit a single row to a statistic with state of shape ``self.shape``.
+        Statistics with a vector shape use this as `_fit_item`, and the row is
+        passed on to the batch path.
+        """
+        row = np.asarray(row, dtype=float)
+        if row.shape != self.shape:
+            err = f"Expected a row of shape {self.shape}, got shape {row.shape}."
+            raise ValueError(err)
+        self._fit_array(row)
+
+    def _fit_row_collection(self, collection):
+        """
+        Fit a collection to a statistic with state of shape ``self.shape``.
+        Statistics with a vector shape use this as `_fit_collection`, so a list
+        is a single row or a list of rows, as an array would be.
+        """
+        self._fit_array(np.asarray(collection, dtype=float))
+
+    def yield_from(self, iterable, every=None, chunksize=None):
         """
         Fit item-by-item and yield the sequential results.
+
+        If `every` is given, a result is only yielded after every `every`
+        items, and after the last item. If `chunksize` is given, items are
+        fitted in chunks of `chunksize` items using the batch path. Giving one
+        of them sets the other to the same value. Both must be positive
+        integers. The results are snapshots, so mutable results such as dicts
+        and lists are copied to read-only types.
+
+        Examples
+        --------
+        >>> from statscollection.online.classes import Mean
+        >>> list(Mean().yield_from(range(10), every=4))
+        [1.5, 3.5, 4.5]
+        >>> list(Mean().yield_from(range(10), every=0))
+        Traceback (most recent call last):
+        ...
+        ValueError: The `every` must be a positive integer, got 0.
         """
+        for name, value in (("every", every), ("chunksize", chunksize)):
+            if value is not None and not (
+                isinstance(value, numbers.Integral) and value > 0
+            ):
+                err = f"The `{name}` must be a positive integer, got {value!r}."
+                raise ValueError(err)
+
+        if every is not None or chunksize is not None:
+            every = every or chunksize
+            chunksize = min(chunksize or every, every)
+            yield from self._yield_strided(iterable, every, chunksize)
+            return None
+
         self_fit = self.fit
         self_eval = self.evaluate
         for item in iterable:
             self_fit(item)
             yield self_eval()
 
-    def return_from(self, iterable):
+    def _yield_strided(self, iterable, every, chunksize):
         """
-        Fit item-by-item and yield the sequential results.
+        Fit chunks of items and yield a snapshot of the result every `every`
+        items. Chunks are split where they cross a stride boundary.
         """
+        remaining = every
+        for chunk in _chunks(iterable, chunksize):
+            start = 0
+            while start < len(chunk):
+                stop = start + min(len(chunk) - start, remaining)
+                self._fit_collection(chunk[start:stop])
+                remaining -= stop - start
+                start = stop
+
+                if not remaining:
+                    yield _snapshot(self.evaluate())
+                    remaining = every
+
+        if remaining < every:
+            yield _snapshot(self.evaluate())
+
+    def return_from(self, iterable, as_array=False):
+        """
+        Fit item-by-item and return the sequential results.
+
+        If `as_array` is True, the items are converted to a NumPy array and
+        the sequential results are returned as an array. Statistics which can
+        compute their sequence of results with vectorized operations do so.
+        Results which are arrays are stacked, and other results which are not
+        numbers, such as dicts, can not be returned as an array.
+
+        Examples
+        --------
+        >>> from statscollection.online.classes import Mean, CentralMoments
+        >>> Mean().return_from([1, 3, 5], as_array=True)
+        array([1., 2., 3.])
+        >>> CentralMoments().return_from([1, 3, 5], as_array=True)
+        Traceback (most recent call last):
+        ...
+        TypeError: CentralMoments returns dict results, not numbers.
+        """
+        if as_array:
+            if isinstance(iterable, Collection):
+                return self._return_array(np.asarray(iterable))
+            elif isinstance(iterable, Iterable):
+                return self._return_array(np.fromiter(iterable, dtype=float))
+
         # A collection, e.g. a list, tuple or np.array
         if isinstance(iterable, Collection):
             return list(self.yield_from(iterable))
@@ -86,6 +194,57 @@ class OnlineStatistic(ABC):
         else:
             raise TypeError("The argument must be an iterable, or a number.")
 
+    def _return_array(self, array):
+        """
+        Fit an array item-by-item and return the sequential results in an
+        array. Subclasses override this with vectorized computations.
+        """
+        results = np.empty(len(array))
+        self_fit_item = self._fit_item
+        self_eval = self.evaluate
+        for index, item in enumerate(array):
+            self_fit_item(item)
+            result = self_eval()
+            if not index:
+                if not isinstance(result, (numbers.Number, np.ndarray)):
+                    name = type(result).__name__
+                    err = f"{type(self).__name__} returns {name} results, not numbers."
+                    raise TypeError(err)
+                results = np.empty((len(array),) + np.shape(result))
+            results[index] = result
+        return results
+
+    def merge(self, other):
+        """
+        Merge the state of another statistic of the same type into this one.
+
+        The resulting state is the one obtained by fitting the data seen by
+        `other` after the data seen by `self`. This makes it possible to fit
+        shards of a data stream independently and combine the results. For
+        statistics over a window of recent items, `other` is a window over the
+        data following the data seen by `self`, so the merged window holds the
+        most recent items of both.
+        """
+        err = f"{type(self).__name__} does not support merging."
+        raise NotImplementedError(err)
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def _check_mergeable(self, other, *attributes):
+        """
+        Raise an error if `other` has another type, or if any of the given
+        parameter attributes differ between `self` and `other`.
+        """
+        if type(other) is not type(self):
+            err = f"Can not merge {type(other).__name__} into {type(self).__name__}."
+            raise TypeError(err)
+
+        for attribute in attributes:
+            if getattr(self, attribute) != getattr(other, attribute):
+                err = f"Can not merge statistics with different `{attribute}`."
+                raise ValueError(err)
+
     @abstractmethod
     def evaluate(self, scalar):
         """
@@ -112,14 +271,29 @@ class WeightedOnlineStatistic(OnlineStatistic):
     def fit(self, iterable_or_item, weights_or_weight):
         """
         Fit an iterable object or a single item. Weights must be passed too.
+        NumPy arrays of items are passed on to the batch path, along with the
+        weights as an array.
         """
-        if isinstance(iterable_or_item, Iterable):
+        if isinstance(iterable_or_item, np.ndarray):
+            weights = np.asarray(weights_or_weight, dtype=float)
+            weights = np.broadcast_to(weights, iterable_or_item.shape[:1])
+            self._fit_array(iterable_or_item, weights)
+        elif isinstance(iterable_or_item, Iterable):
             self._fit_iterable(iterable_or_item, weights_or_weight)
         else:
             self._fit_item(iterable_or_item, weights_or_weight)
 
         return self
 
+    def _fit_array(self, array, weights):
+        """
+        Fit a NumPy array of items and an array of weights. Subclasses override
+        this with a vectorized kernel.
+        """
+        self_fit_item = self._fit_item
+        for item, weight in zip(array, weights):
+            self_fit_item(item, weight)
+
     def _fit_iterable(self, iterable, weights):
         """
         Fit an iterable by fitting every item and weight sequentially.
@@ -150,6 +324,60 @@ class WeightedOnlineStatistic(OnlineStatistic):
         pass
 
 
+def _snapshot(result):
+    """
+    Return an immutable copy of a result, if the result is mutable.
+
+    Examples
+    --------
+    >>> _snapshot({2: 0.5})
+    mappingproxy({2: 0.5})
+    >>> _snapshot([1, 2])
+    (1, 2)
+    """
+    if isinstance(result, dict):
+        return types.MappingProxyType(dict(result))
+    elif isinstance(result, list):
+        return tuple(result)
+    elif isinstance(result, np.ndarray):
+        result = result.copy()
+        result.setflags(write=False)
+    return result
+
+
+def _chunks(iterable, chunksize):
+    """
+    Yield chunks of at most `chunksize` items from an iterable.
+
+    Arrays are sliced without copying. Other iterables are consumed lazily, and
+    chunks of numbers are converted to arrays so they may use the batch path.
+
+    Examples
+    --------
+    >>> list(_chunks(iter([1, 2, 3, 4, 5]), chunksize=2))
+    [array([1, 2]), array([3, 4]), array([5])]
+    >>> list(_chunks(iter(["a", "b", "c"]), chunksize=2))
+    [['a', 'b'], ['c']]
+    """
+    if isinstance(iterable, np.ndarray):
+        for start in range(0, len(iterable), chunksize):
+            yield iterable[start : start + chunksize]
+        return None
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return None
+
+        try:
+            array = np.asarray(chunk)
+        except ValueError:
+            yield chunk
+            continue
+        yield array if array.dtype.kind in "biuf" else chunk
+
+
 if __name__ == "__main__":
     import pytest
 
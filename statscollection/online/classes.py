@@ -3,9 +3,45 @@
 """
 Classes containing algorithms for online statistics.
 """
+import bisect
 import functools
 import math
-from .abstract_classes import OnlineStatistic, WeightedOnlineStatistic
+import numbers
+import numpy as np
+from .abstract_classes import OnlineStatistic, WeightedOnlineStatistic, _chunks
+
+
+def _as_shape(shape):
+    """
+    Return a shape as a tuple of ints. An int gives a 1-D shape.
+    """
+    if isinstance(shape, numbers.Integral):
+        return (int(shape),)
+    return tuple(int(size) for size in shape)
+
+
+def _as_rows(array, shape):
+    """
+    Return an array as rows of the given shape along axis 0. An array of the
+    given shape is a single row, and an empty 1-D array has no rows.
+    """
+    if not shape:
+        return array
+    if array.shape == shape:
+        return array[np.newaxis]
+    if array.shape == (0,):
+        return array.reshape((0,) + shape)
+    if array.shape[1:] != shape:
+        err = f"Expected rows of shape {shape}, got an array of shape {array.shape}."
+        raise ValueError(err)
+    return array
+
+
+def _unwrap(value):
+    """
+    Return a Python scalar for a scalar value, and a copy of an array.
+    """
+    return value.item() if np.ndim(value) == 0 else value.copy()
 
 
 class Mean(OnlineStatistic):
@@ -27,18 +63,103 @@ class Mean(OnlineStatistic):
     >>> mean = mean.fit(1)
     >>> print(mean.evaluate())
     1.0
+
+    NumPy arrays are fitted in a single vectorized pass.
+
+    >>> import numpy as np
+    >>> Mean().fit(np.array([1, 2, 3, 4])).evaluate()
+    2.5
+
+    Statistics fitted on separate shards of the data may be merged.
+
+    >>> mean = Mean().fit([1, 2])
+    >>> mean += Mean().fit([3, 4, 5])
+    >>> mean.evaluate()
+    3.0
+
+    The sequential results may be returned as an array, which is computed
+    with vectorized operations. Fitting continues from the current state.
+
+    >>> mean.return_from([9, 11], as_array=True)
+    array([4., 5.])
+
+    With `shape`, the mean of every column of a 2-D array is computed at once,
+    and the state is kept in arrays. A 1-D array of that shape is one row.
+
+    >>> mean = Mean(shape=3).fit(np.array([[1, 2, 3], [3, 4, 5]]))
+    >>> mean.fit(np.array([5, 0, 1])).evaluate()
+    array([3., 2., 3.])
+
+    Lists are rows as well, and items of another shape are rejected.
+
+    >>> mean.fit([[3, 1, 1]]).n_
+    4
+    >>> mean.fit([1, 2])
+    Traceback (most recent call last):
+    ...
+    ValueError: Expected rows of shape (3,), got an array of shape (2,).
+    >>> mean.fit(5)
+    Traceback (most recent call last):
+    ...
+    ValueError: Expected a row of shape (3,), got shape ().
     """
 
-    def __init__(self):
+    def __init__(self, shape=()):
+        """
+
+        Parameters
+        ----------
+        shape : int or tuple of ints
+            The shape of a single item. The default is a scalar.
+        """
+        self.shape = _as_shape(shape)
         self.n_ = 0
-        self.mean_ = 0
+        self.mean_ = np.zeros(self.shape) if self.shape else 0
+        if self.shape:
+            self._fit_item = self._fit_row
+            self._fit_collection = self._fit_row_collection
 
     def _fit_item(self, item):
         self.n_ += 1
         self.mean_ += (item - self.mean_) / self.n_
 
+    def _fit_array(self, array):
+        rows = _as_rows(array, self.shape)
+        if not len(rows):
+            return None
+        self._combine(len(rows), _unwrap(rows.mean(axis=0)))
+
+    def _return_array(self, array):
+        rows = _as_rows(array, self.shape)
+        if not len(rows):
+            return np.empty(rows.shape)
+
+        # Cumulative sums are taken of deviations from a shift close to the
+        # mean, which reduces the loss of precision for large offsets
+        shift = self.mean_ if self.n_ else rows[0]
+        counts = np.arange(self.n_ + 1, self.n_ + len(rows) + 1)
+        counts = counts.reshape((-1,) + (1,) * len(self.shape))
+        means = shift + np.cumsum(rows - shift, axis=0) / counts
+
+        self.n_ += len(rows)
+        self.mean_ = _unwrap(means[-1])
+        return means
+
+    def _combine(self, n, mean):
+        """
+        Fold the count and mean of another batch into the state.
+        """
+        self.n_ += n
+        self.mean_ += (mean - self.mean_) * (n / self.n_)
+
+    def merge(self, other):
+        self._check_mergeable(other, "shape")
+        if other.n_:
+            self._combine(other.n_, other.mean_)
+        return self
+
     def evaluate(self):
-        return self.mean_
+        return _unwrap(self.mean_) if self.shape else self.mean_
 
 
 class WeightedMean(WeightedOnlineStatistic):
@@ -47,6 +168,11 @@ class WeightedMean(WeightedOnlineStatistic):
 
     More info here.
 
+    Examples
+    --------
+    >>> import numpy as np
+    >>> WeightedMean().fit(np.array([1, 2, 3]), np.array([3, 1, 0])).evaluate()
+    1.25
     """
 
     def __init__(self):
@@ -57,6 +183,24 @@ class WeightedMean(WeightedOnlineStatistic):
         self.w_ += weight
         self.mean_ += ((item - self.mean_) / self.w_) * weight
 
+    def _fit_array(self, array, weights):
+        w = weights.sum().item()
+        if w:
+            self._combine(w, np.dot(array, weights).item() / w)
+
+    def _combine(self, w, mean):
+        """
+        Fold the total weight and weighted mean of another batch into the state.
+        """
+        self.w_ += w
+        self.mean_ += (mean - self.mean_) * (w / self.w_)
+
+    def merge(self, other):
+        self._check_mergeable(other)
+        if other.w_:
+            self._combine(other.w_, other.mean_)
+        return self
+
     def evaluate(self):
         return self.mean_
 
@@ -64,31 +208,137 @@ class WeightedMean(WeightedOnlineStatistic):
 class Max(OnlineStatistic):
     """
     The maximum.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> Max().fit(np.array([3, 1, 4])).evaluate()
+    4
+
+    NaN is ignored, by items and arrays alike.
+
+    >>> Max().fit(np.array([1.0, np.nan, 3.0])).evaluate()
+    3.0
+    >>> Max().fit([1.0, np.nan, 3.0]).evaluate()
+    3.0
+
+    With `shape`, the maximum of every column of a 2-D array is computed at
+    once, and the state is kept in an array.
+
+    >>> Max(shape=2).fit(np.array([[3, 1], [1, 5], [4, 2]])).evaluate()
+    array([4., 5.])
     """
 
-    def __init__(self):
-        self.max_ = -float("inf")
+    def __init__(self, shape=()):
+        """
+
+        Parameters
+        ----------
+        shape : int or tuple of ints
+            The shape of a single item. The default is a scalar.
+        """
+        self.shape = _as_shape(shape)
+        self.max_ = np.full(self.shape, -np.inf) if self.shape else -float("inf")
+        if self.shape:
+            self._fit_item = self._fit_row
+            self._fit_collection = self._fit_row_collection
 
     def _fit_item(self, item):
         self.max_ = max(self.max_, item)
 
+    def _fit_array(self, array):
+        rows = _as_rows(array, self.shape)
+        if not len(rows):
+            return None
+        if self.shape:
+            np.fmax(self.max_, np.fmax.reduce(rows, axis=0), out=self.max_)
+        else:
+            self.max_ = max(self.max_, np.fmax.reduce(rows).item())
+
+    def _return_array(self, array):
+        rows = _as_rows(array, self.shape)
+        maxima = np.fmax(np.fmax.accumulate(rows, axis=0), self.max_)
+        if len(rows):
+            self.max_ = _unwrap(maxima[-1])
+        return maxima
+
+    def merge(self, other):
+        self._check_mergeable(other, "shape")
+        if self.shape:
+            np.maximum(self.max_, other.max_, out=self.max_)
+        else:
+            self.max_ = max(self.max_, other.max_)
+        return self
+
     def evaluate(self):
-        return self.max_
+        return _unwrap(self.max_) if self.shape else self.max_
 
 
 class Min(OnlineStatistic):
     """
     The minimum.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> Min().fit(np.array([3, 1, 4])).evaluate()
+    1
+
+    NaN is ignored, by items and arrays alike.
+
+    >>> Min().fit(np.array([1.0, np.nan, 3.0])).evaluate()
+    1.0
+
+    With `shape`, the minimum of every column of a 2-D array is computed at
+    once, and the state is kept in an array.
+
+    >>> Min(shape=2).fit(np.array([[3, 1], [1, 5], [4, 2]])).evaluate()
+    array([1., 1.])
     """
 
-    def __init__(self):
-        self.min_ = float("inf")
+    def __init__(self, shape=()):
+        """
+
+        Parameters
+        ----------
+        shape : int or tuple of ints
+            The shape of a single item. The default is a scalar.
+        """
+        self.shape = _as_shape(shape)
+        self.min_ = np.full(self.shape, np.inf) if self.shape else float("inf")
+        if self.shape:
+            self._fit_item = self._fit_row
+            self._fit_collection = self._fit_row_collection
 
     def _fit_item(self, item):
         self.min_ = min(self.min_, item)
 
+    def _fit_array(self, array):
+        rows = _as_rows(array, self.shape)
+        if not len(rows):
+            return None
+        if self.shape:
+            np.fmin(self.min_, np.fmin.reduce(rows, axis=0), out=self.min_)
+        else:
+            self.min_ = min(self.min_, np.fmin.reduce(rows).item())
+
+    def _return_array(self, array):
+        rows = _as_rows(array, self.shape)
+        minima = np.fmin(np.fmin.accumulate(rows, axis=0), self.min_)
+        if len(rows):
+            self.min_ = _unwrap(minima[-1])
+        return minima
+
+    def merge(self, other):
+        self._check_mergeable(other, "shape")
+        if self.shape:
+            np.minimum(self.min_, other.min_, out=self.min_)
+        else:
+            self.min_ = min(self.min_, other.min_)
+        return self
+
     def evaluate(self):
-        return self.min_
+        return _unwrap(self.min_) if self.shape else self.min_
 
 
 class GeometricMean(OnlineStatistic):
@@ -118,6 +368,18 @@ class GeometricMean(OnlineStatistic):
             self.neg_ += 1
         self.mean_log_._fit_item(math.log(item))
 
+    def _fit_array(self, array):
+        # Mirror the domain check done by `math.log` on the item path
+        if np.any(array <= 0):
+            raise ValueError("math domain error")
+        self.mean_log_._fit_array(np.log(array))
+
+    def merge(self, other):
+        self._check_mergeable(other)
+        self.neg_ += other.neg_
+        self.mean_log_.merge(other.mean_log_)
+        return self
+
     def evaluate(self):
         if self.neg_ % 2 == 0:
             return math.exp(self.mean_log_.evaluate())
@@ -133,6 +395,13 @@ class HarmonicMean(OnlineStatistic):
     --------
     >>> HarmonicMean().fit([4, 2, 3]).evaluate()
     2.7692307692307696
+    >>> import numpy as np
+    >>> HarmonicMean().fit(np.array([4, 2, 3])).evaluate()
+    2.769230769230769...
+    >>> HarmonicMean().fit(np.array([4, 0, 3]))
+    Traceback (most recent call last):
+    ...
+    ZeroDivisionError: division by zero
     """
 
     def __init__(self):
@@ -143,6 +412,19 @@ class HarmonicMean(OnlineStatistic):
         self.n_ += 1
         self.reciprocal_sum_ += 1 / item
 
+    def _fit_array(self, array):
+        # Mirror the division by zero on the item path
+        if np.any(array == 0):
+            raise ZeroDivisionError("division by zero")
+        self.n_ += len(array)
+        self.reciprocal_sum_ += np.sum(1 / array).item()
+
+    def merge(self, other):
+        self._check_mergeable(other)
+        self.n_ += other.n_
+        self.reciprocal_sum_ += other.reciprocal_sum_
+        return self
+
     def evaluate(self):
         return self.n_ / self.reciprocal_sum_
 
@@ -154,18 +436,126 @@ def naive_moment(data, p):
     return sum((d - m) ** p for d in data)
 
 
-@functools.lru_cache(maxsize=1024, typed=False)
-def choose(n, k):
-    if 2 * k > n:
-        return choose(n, n - k)
+@functools.lru_cache(maxsize=None)
+def _pascal_matrix(order_max):
+    """
+    Return the binomial coefficients C(p, k) for 0 <= k <= p <= order_max as a
+    lower triangular matrix, along with the matrix of indices max(p - k, 0).
+
+    Examples
+    --------
+    >>> binomial, index = _pascal_matrix(3)
+    >>> binomial
+    array([[1., 0., 0., 0.],
+           [1., 1., 0., 0.],
+           [1., 2., 1., 0.],
+           [1., 3., 3., 1.]])
+    """
+    # Exact integer arithmetic, so high orders do not lose precision
+    rows = [[1]]
+    for order in range(order_max):
+        rows.append([1] + [a + b for (a, b) in zip(rows[-1], rows[-1][1:])] + [1])
+
+    binomial = np.zeros((order_max + 1, order_max + 1))
+    for order, row in enumerate(rows):
+        binomial[order, : order + 1] = row
+
+    orders = np.arange(order_max + 1)
+    index = np.maximum(orders[:, np.newaxis] - orders, 0)
+
+    binomial.setflags(write=False)
+    index.setflags(write=False)
+    return binomial, index
+
+
+@functools.lru_cache(maxsize=None)
+def _binomial_rows(order_max):
+    """
+    Return the rows of `_pascal_matrix` as tuples of Python floats, for
+    scalar recurrences.
+
+    Examples
+    --------
+    >>> _binomial_rows(3)[3]
+    (1.0, 3.0, 3.0, 1.0)
+    """
+    binomial, _ = _pascal_matrix(order_max)
+    return tuple(tuple(row[: order + 1]) for order, row in enumerate(binomial.tolist()))
+
+
+def _central_moments(array, order_max):
+    """
+    Return the mean of an array, and an array with the count followed by the
+    sums of powers of deviations from the mean, up to order `order_max`. The
+    sums are taken along axis 0, and the orders are along the first axis of
+    the result.
+    """
+    mean = array.mean(axis=0)
+    deviations = array - mean
+    powers = deviations.copy()
+
+    moments = np.zeros((order_max + 1,) + mean.shape)
+    moments[0] = len(array)
+    for order in range(2, order_max + 1):
+        powers *= deviations
+        moments[order] = powers.sum(axis=0)
+
+    return _unwrap(mean), moments
+
 
-    return math.factorial(n) / (math.factorial(k) * math.factorial(n - k))
+def _combine_central_moments(mean_a, moments_a, mean_b, moments_b):
+    """
+    Return the mean and the central moments of the union of two batches, using
+    the arbitrary order pairwise update by Pébay et al. The counts are given
+    by ``moments[0]``. A batch is removed by combining with its negated
+    moments, including the count.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> mean, moments = _combine_central_moments(
+    ...     *_central_moments(np.array([1.0, 2.0]), 3),
+    ...     *_central_moments(np.array([6.0]), 3),
+    ... )
+    >>> print(mean, moments)
+    3.0 [ 3.  0. 14. 18.]
+    >>> removed = -np.array([1.0, 0.0, 0.0, 0.0])
+    >>> mean, moments = _combine_central_moments(mean, moments, 6.0, removed)
+    >>> print(mean, moments)
+    1.5 [2.  0.  0.5 0. ]
+    """
+    n_a, n_b = moments_a[0], moments_b[0]
+    n_total = n_a + n_b
+    delta = mean_b - mean_a
+
+    # With M_0 = n and M_1 = 0 every order is a sum over the binomial table
+    binomial, index = _pascal_matrix(len(moments_a) - 1)
+    orders = index[:, 0].reshape((-1,) + (1,) * np.ndim(delta))
+    factor_a = (-n_b * delta / n_total) ** orders
+    factor_b = (n_a * delta / n_total) ** orders
+    if np.ndim(delta):
+        # Moments of vectors, with the orders along the first axis
+        subscripts = "pk,pk...,k...->p..."
+        combined = np.einsum(subscripts, binomial, moments_a[index], factor_a)
+        combined += np.einsum(subscripts, binomial, moments_b[index], factor_b)
+    else:
+        combined = (binomial * moments_a[index]) @ factor_a
+        combined += (binomial * moments_b[index]) @ factor_b
+    combined[1] = 0
+
+    return mean_a + delta * (n_b / n_total), combined
 
 
 class CentralMoments(OnlineStatistic):
     """
     The central moments up to order `order_max`.
 
+    The sums of powers of deviations from the mean, sum((x - mean)^p), are
+    stored in an array together with the count. Items and arrays are fitted
+    by combining their central moments with the current ones, using the
+    arbitrary order update by Pébay et al., with a precomputed table of
+    binomial coefficients.
+
     See https://arxiv.org/pdf/1510.04923.pdf
 
     Examples
@@ -182,56 +572,112 @@ class CentralMoments(OnlineStatistic):
     ...   print((moment[3], moment[4]))
     (0.0, 0.0)
     (0.0, 78.125)
-    (6.222222222222222, 80.22222222222223)
-    (16.87500000000002, 312.078125)
-    (-7.919999999999952, 604.5759999999998)
-    (35.44444444444449, 640.486111111111)
+    (6.222222222222222, 80.22222222222221)
+    (16.874999999999996, 312.078125)
+    (-7.920000000000002, 604.576)
+    (35.444444444444436, 640.4861111111112)
+
+    Evaluating at every item is often not needed. With `every`, the items are
+    fitted in chunks, and a read-only snapshot is yielded at stride boundaries.
+
+    >>> for moment in CentralMoments(order_max=2).yield_from(data, every=3):
+    ...   print(moment)
+    {2: 12.666666666666666}
+    {2: 48.833333333333336}
+
+    Arrays are fitted by computing the central moments of the whole array,
+    which are then combined with the current state. High orders are supported.
+
+    >>> import numpy as np
+    >>> moments = CentralMoments(order_max=4).fit(np.array(data)).evaluate()
+    >>> print(round(moments[3], 8), round(moments[4], 8))
+    35.44444444 640.48611111
+    >>> moments = CentralMoments(order_max=20).fit(np.array(data)).evaluate()
+    >>> print(f"{moments[20]:.6e}")
+    2.967239e+12
+
+    With `shape`, the moments of every column of a 2-D array are computed at
+    once, and every order is an array.
+
+    >>> columns = np.array([[1, 3], [5, 8], [3, 5], [7, 1]])
+    >>> CentralMoments(order_max=3, shape=2).fit(columns).evaluate()[2]
+    array([20.  , 26.75])
     """
 
-    def __init__(self, order_max=2):
+    def __init__(self, order_max=2, shape=()):
         """
 
         Parameters
         ----------
         order_max : int
+        shape : int or tuple of ints
+            The shape of a single item. The default is a scalar.
         """
         self.order_max = order_max
+        self.shape = _as_shape(shape)
         self.n_ = 0
-        self.mean_ = 0
-        self.moments_ = {o: 0 for o in range(2, order_max + 1)}
+        self.mean_ = np.zeros(self.shape) if self.shape else 0
+
+        # The count is stored in position 0, and position 1 is always 0
+        self.moments_ = np.zeros((order_max + 1,) + self.shape)
+        if self.shape:
+            self._fit_item = self._fit_row
+            self._fit_collection = self._fit_row_collection
 
     def _fit_item(self, item):
+        n_a = self.n_
+        self.n_ = n = n_a + 1
+        delta = item - self.mean_
+        self.mean_ += delta / n
+
+        # The combination in `_combine_central_moments`, with the moments of
+        # the item being (1, 0, ...), as a scalar recurrence. Orders are
+        # updated from the highest down, since they depend on lower orders.
+        order_max = self.order_max
+        moments_ = self.moments_
+        moments = moments_.tolist()
+        step = -delta / n
+        powers = [1.0, step]
+        for order in range(2, order_max + 1):
+            powers.append(powers[-1] * step)
+
+        last = n_a * delta / n
+        binomial = _binomial_rows(order_max)
+        for order in range(order_max, 1, -1):
+            row = binomial[order]
+            moment = moments[order] + n_a * powers[order] + last ** order
+            for k in range(1, order - 1):
+                moment += row[k] * moments[order - k] * powers[k]
+            moments[order] = moments_[order] = moment
+        moments_[0] = n
+
+    def _fit_array(self, array):
+        rows = _as_rows(array, self.shape)
+        if not len(rows):
+            return None
+        self._combine(*_central_moments(rows, self.order_max))
+
+    def _combine(self, mean, moments):
         """
+        Fold the mean and the central moments of another batch into the state.
+        The count of the other batch is given by ``moments[0]``.
         """
-        self.n_ += 1
-        delta = item - self.mean_
-        self.mean_ += delta / self.n_
-
-        self.moments_[2] += delta * (delta - (delta / self.n_))
-
-        # Precompute delta / n to the power of k outside of the loop
-        delta_div_k_powers = [(delta / self.n_) ** k for k in range(1, self.order_max)]
-
-        for order in range(3, self.order_max + 1):
-
-            # time is spent here
-            elements = [
-                choose(order, k) * delta_div_k_powers[k - 1] * self.moments_[order - k]
-                for k in range(1, order - 1)
-            ]
-
-            # print([(delta / self.n_)**k for k in range(1, order-1)])
-            # print(delta_div_k_powers)
-            # print(elements)
-            elements = sum(elements)
+        self.mean_, self.moments_ = _combine_central_moments(
+            self.mean_, self.moments_, mean, moments
+        )
+        self.n_ += int(np.ravel(moments[0])[0])
 
-            self.moments_[order] += -elements + delta * (
-                delta ** (order - 1) - (delta / self.n_) ** (order - 1)
-            )
-            # print(order)
+    def merge(self, other):
+        self._check_mergeable(other, "order_max", "shape")
+        if other.n_:
+            self._combine(other.mean_, other.moments_)
+        return self
 
     def evaluate(self):
-        return self.moments_
+        orders = range(2, self.order_max + 1)
+        if not self.shape:
+            return dict(zip(orders, self.moments_[2:].tolist()))
+        return dict(zip(orders, [moment.copy() for moment in self.moments_[2:]]))
 
 
 class Variance(OnlineStatistic):
@@ -249,12 +695,34 @@ class Variance(OnlineStatistic):
     0.0
     0.25
     0.666666666666...
+    >>> import numpy as np
+    >>> Variance().fit(np.array([1, 2, 3, 4])).evaluate()
+    1.25
+    >>> Variance().return_from([1, 2, 3, 4], as_array=True)
+    array([0.        , 0.25      , 0.66666667, 1.25      ])
+
+    With `shape`, the variance of every column of a 2-D array is computed at
+    once, and the state is kept in arrays.
+
+    >>> Variance(shape=2).fit(np.array([[1, 3], [2, 1], [3, 2], [4, 6]])).evaluate()
+    array([1.25, 3.5 ])
     """
 
-    def __init__(self):
+    def __init__(self, shape=()):
+        """
+
+        Parameters
+        ----------
+        shape : int or tuple of ints
+            The shape of a single item. The default is a scalar.
+        """
+        self.shape = _as_shape(shape)
         self.n_ = 0
-        self.mean_ = 0
-        self.var_ = 0
+        self.mean_ = np.zeros(self.shape) if self.shape else 0
+        self.var_ = np.zeros(self.shape) if self.shape else 0
+        if self.shape:
+            self._fit_item = self._fit_row
+            self._fit_collection = self._fit_row_collection
 
     def _fit_item(self, item):
         self.n_ += 1
@@ -263,12 +731,265 @@ class Variance(OnlineStatistic):
 
         self.var_ += delta * (delta - (delta / self.n_))
 
+    def _fit_array(self, array):
+        rows = _as_rows(array, self.shape)
+        if not len(rows):
+            return None
+        mean = rows.mean(axis=0)
+        deviations = rows - mean
+        var = np.sum(deviations * deviations, axis=0)
+        self._combine(len(rows), _unwrap(mean), _unwrap(var))
+
+    def _return_array(self, array):
+        rows = _as_rows(array, self.shape)
+        if not len(rows):
+            return np.empty(rows.shape)
+
+        # Running sums of deviations from a shift close to the mean give the
+        # count, mean and sum of squared deviations of every prefix of the
+        # array. These are combined with the state as in `_combine`.
+        shift = self.mean_ if self.n_ else rows[0]
+        deviations = rows - shift
+        counts = np.arange(1, len(rows) + 1)
+        counts = counts.reshape((-1,) + (1,) * len(self.shape))
+        sums = np.cumsum(deviations, axis=0)
+        var = np.cumsum(deviations ** 2, axis=0) - sums ** 2 / counts
+        var = np.maximum(var, 0)
+
+        n_a, n_total = self.n_, self.n_ + counts
+        delta = shift - self.mean_ + sums / counts
+        var += self.var_ + delta ** 2 * (n_a * counts / n_total)
+
+        self.n_ = n_total[-1].item()
+        self.mean_ = _unwrap(self.mean_ + delta[-1] * (len(rows) / self.n_))
+        self.var_ = _unwrap(var[-1])
+        return var / n_total
+
+    def _combine(self, n, mean, var):
+        """
+        Fold the count, mean and sum of squared deviations of another batch
+        into the state, using the pairwise update by Chan et al.
+        """
+        n_a, n_total = self.n_, self.n_ + n
+        delta = mean - self.mean_
+        self.var_ += var + delta ** 2 * (n_a * n / n_total)
+        self.n_ = n_total
+        self.mean_ += delta * (n / n_total)
+
+    def merge(self, other):
+        self._check_mergeable(other, "shape")
+        if other.n_:
+            self._combine(other.n_, other.mean_, other.var_)
+        return self
+
     def evaluate(self):
         return self.var_ / self.n_
 
 
-def iterate_paralell(iterable, statistics):
-    pass
+class Histogram(OnlineStatistic):
+    """
+    A histogram with fixed bins.
+
+    The counts are kept in an array, together with the number of items below
+    and above the bins. Arrays are binned with `np.searchsorted`, and counted
+    with `np.bincount`. As in `np.histogram`, every bin includes its left
+    edge, and the last bin also includes its right edge. NaNs are ignored.
+
+    Parameters
+    ----------
+    bins : int or sequence of floats
+        The number of bins, or the bin edges in increasing order.
+    range : tuple of floats
+        The lower and upper edge of the bins, if `bins` is an int.
+    log : bool
+        If True, and `bins` is an int, the bins are equally spaced on a
+        logarithmic scale, e.g. for latencies. The range must be positive.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> histogram = Histogram(bins=4, range=(0, 8))
+    >>> histogram = histogram.fit(np.array([-1, 0, 1, 3, 3, 7, 8, 9])).fit(5.5)
+    >>> histogram.evaluate()
+    array([2, 2, 1, 2])
+    >>> histogram.underflow_, histogram.overflow_
+    (1, 1)
+    >>> histogram.evaluate(density=True)
+    array([0.14285714, 0.14285714, 0.07142857, 0.14285714])
+    >>> histogram.quantile(0.5)
+    3.5
+    >>> histogram.quantile([0.1, 0.9])
+    array([0., 8.])
+
+    Log-spaced bins for latencies.
+
+    >>> latency = Histogram(bins=3, range=(1, 1000), log=True)
+    >>> latency.bin_edges
+    array([   1.,   10.,  100., 1000.])
+    >>> latency.fit(np.array([2.5, 40, 70, 300])).evaluate()
+    array([1, 2, 1])
+    >>> Histogram(bins=2).evaluate(density=True)
+    array([0., 0.])
+    """
+
+    def __init__(self, bins=10, range=(0.0, 1.0), log=False):
+        self.bins = bins
+        self.range = range
+        self.log = log
+
+        if not isinstance(bins, numbers.Integral):
+            self.bin_edges = np.asarray(bins, dtype=float)
+        elif log:
+            if range[0] <= 0:
+                raise ValueError("The `range` of log-spaced bins must be positive.")
+            self.bin_edges = np.geomspace(range[0], range[1], num=bins + 1)
+        else:
+            self.bin_edges = np.linspace(range[0], range[1], num=bins + 1)
+
+        self._edges = self.bin_edges.tolist()
+        self.counts_ = np.zeros(len(self.bin_edges) - 1, dtype=np.int64)
+        self.underflow_ = 0
+        self.overflow_ = 0
+
+    def _fit_item(self, item):
+        if item != item:
+            return None
+        index = bisect.bisect_right(self._edges, item) - 1
+        if index < 0:
+            self.underflow_ += 1
+        elif index < len(self.counts_) or item == self._edges[-1]:
+            self.counts_[min(index, len(self.counts_) - 1)] += 1
+        else:
+            self.overflow_ += 1
+
+    def _fit_array(self, array):
+        if array.dtype.kind == "f":
+            array = array[~np.isnan(array)]
+
+        # Index 0 is the underflow, and the last index is the overflow
+        indices = np.searchsorted(self.bin_edges, array, side="right")
+        indices[array == self.bin_edges[-1]] = len(self.counts_)
+        counts = np.bincount(indices, minlength=len(self.bin_edges) + 1)
+
+        self.underflow_ += counts[0].item()
+        self.counts_ += counts[1:-1]
+        self.overflow_ += counts[-1].item()
+
+    def merge(self, other):
+        self._check_mergeable(other)
+        if not np.array_equal(self.bin_edges, other.bin_edges):
+            raise ValueError("Can not merge statistics with different `bin_edges`.")
+
+        self.counts_ += other.counts_
+        self.underflow_ += other.underflow_
+        self.overflow_ += other.overflow_
+        return self
+
+    def evaluate(self, density=False):
+        """
+        Return the counts of the bins. With `density`, return the counts
+        divided by the number of items in the bins and the bin widths, so that
+        the histogram integrates to 1 over the bins. An empty histogram has
+        density zero.
+        """
+        if density:
+            total = self.counts_.sum()
+            if not total:
+                return np.zeros(len(self.counts_))
+            return self.counts_ / (total * np.diff(self.bin_edges))
+        return self.counts_.copy()
+
+    def quantile(self, q):
+        """
+        Return approximate quantiles, interpolating linearly within the bins.
+        Items below or above the bins are counted at the lower or upper edge.
+        """
+        counts = np.concatenate(([self.underflow_], self.counts_, [self.overflow_]))
+        cumulative = np.cumsum(counts)
+        edges = np.concatenate(([self.bin_edges[0]], self.bin_edges))
+        edges = np.concatenate((edges, [self.bin_edges[-1]]))
+
+        # The cumulative count at the right edge of every bin
+        targets = np.asarray(q, dtype=float) * cumulative[-1]
+        bins = np.minimum(np.searchsorted(cumulative, targets), len(counts) - 1)
+        below = cumulative[bins] - counts[bins]
+        fraction = (targets - below) / np.maximum(counts[bins], 1)
+        quantiles = edges[bins] + fraction * (edges[bins + 1] - edges[bins])
+        return quantiles.item() if np.ndim(q) == 0 else quantiles
+
+
+def iterate_paralell(iterable, statistics, chunksize=2 ** 14):
+    """
+    Fit several statistics in a single pass over an iterable.
+
+    The iterable is consumed once, in chunks of `chunksize` items. Every chunk
+    is passed to every statistic, so chunks of numbers use the batch path.
+    This is useful when the iterable is a generator, e.g. reading from a
+    file, which would otherwise have to be duplicated or read several times.
+
+    Parameters
+    ----------
+    iterable : iterable
+        An iterable of items, such as a generator or an array.
+    statistics : list
+        A list of OnlineStatistic instances. They are fitted in place.
+    chunksize : int
+        The number of items to pull from the iterable at a time.
+
+    Returns
+    -------
+    list
+        The result of evaluating every statistic after fitting.
+
+    Examples
+    --------
+    >>> stream = (x for x in [3, 1, 4, 1, 5, 9, 2, 6])
+    >>> statistics = [Mean(), Min(), Max()]
+    >>> iterate_paralell(stream, statistics, chunksize=3)
+    [3.875, 1, 9]
+    >>> [statistic.evaluate() for statistic in statistics]
+    [3.875, 1, 9]
+    """
+    for chunk in _chunks(iterable, chunksize):
+        for statistic in statistics:
+            statistic.fit(chunk)
+
+    return [statistic.evaluate() for statistic in statistics]
+
+
+def timetest(n):
+    """
+    Time fitting several statistics on a generator in a single pass, compared
+    with a separate pass over a new generator for every statistic. Both use
+    the same chunks, so the difference is the cost of reading the data once
+    per statistic. Fitting item by item is timed for reference.
+    """
+    import random
+    import time
+
+    random.seed(123)
+    data = [random.random() for i in range(n)]
+
+    def statistics():
+        return [Mean(), Variance(), Min(), Max(), CentralMoments(order_max=4)]
+
+    st = time.perf_counter()
+    for statistic in statistics():
+        statistic.fit(x for x in data)
+    per_item = time.perf_counter() - st
+
+    st = time.perf_counter()
+    for statistic in statistics():
+        for chunk in _chunks((x for x in data), 2 ** 14):
+            statistic.fit(chunk)
+    passes = time.perf_counter() - st
+
+    st = time.perf_counter()
+    iterate_paralell((x for x in data), statistics())
+    fused = time.perf_counter() - st
+
+    print(f"one chunked pass per statistic: {passes:.4f}s, fused: {fused:.4f}s")
+    print(f"one pass per statistic, item by item: {per_item:.4f}s")
 
 
 def main():
@@ -297,23 +1018,23 @@ def main():
         random.shuffle(data)
 
         st = time.perf_counter()
-        means = list(Mean().yield_from(data))
+        means = Mean().return_from(data, as_array=True)
         print(time.perf_counter() - st)
         print(means[-1])
         plt.plot(means, label="mean")
 
         st = time.perf_counter()
-        means = list(Max().yield_from(data))
+        means = Max().return_from(data, as_array=True)
         print(time.perf_counter() - st)
         plt.plot(means)
 
         st = time.perf_counter()
-        means = list(Min().yield_from(data))
+        means = Min().return_from(data, as_array=True)
         print(time.perf_counter() - st)
         plt.plot(means)
 
         st = time.perf_counter()
-        variances = list(Variance().yield_from(data))
+        variances = Variance().return_from(data, as_array=True)
         print(time.perf_counter() - st)
         plt.plot(variances)
 
@@ -344,3 +1065,5 @@ def main():
 
 if __name__ == "__main__":
     main()
+
+    timetest(n=10 ** 6)
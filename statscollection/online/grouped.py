@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Online statistics for every key of a data stream of keys and values.
+"""
+from .abstract_classes import WeightedOnlineStatistic
+from .classes import Mean, Variance, Min, Max
+import numpy as np
+
+# The state arrays of every supported statistic, with their initial values
+_FIELDS = {
+    Mean: {"n": 0, "mean": 0.0},
+    Variance: {"n": 0, "mean": 0.0, "var": 0.0},
+    Min: {"min": np.inf},
+    Max: {"max": -np.inf},
+}
+
+
+class GroupedStatistic(WeightedOnlineStatistic):
+    """
+    A statistic for every key, e.g. the mean value per customer.
+
+    Keys and values are fitted in pairs, like items and weights. Every key is
+    mapped to an integer index, and the state of all keys is stored in
+    parallel NumPy arrays, e.g. the counts and the means. The arrays double
+    in size when they are full, so growth is amortized. A batch of keys and
+    values is reduced per key with `np.bincount` and `np.fmin.at`, and
+    folded into the state with vectorized updates. Statistics of shards are
+    merged key by key.
+
+    Parameters
+    ----------
+    statistic_cls : type
+        One of `Mean`, `Variance`, `Min` or `Max`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> keys = np.array(["a", "b", "a", "c", "a"])
+    >>> values = np.array([1.0, 5.0, 3.0, 2.0, 8.0])
+    >>> means = GroupedStatistic(Mean).fit(keys, values).fit("c", 4.0)
+    >>> means.evaluate()
+    {'a': 4.0, 'b': 5.0, 'c': 3.0}
+    >>> means.evaluate("a")
+    4.0
+    >>> GroupedStatistic(Max).fit(keys, values).evaluate()
+    {'a': 8.0, 'b': 5.0, 'c': 2.0}
+    >>> means.fit(["a", "b"], 7.0).evaluate()
+    {'a': 4.75, 'b': 6.0, 'c': 3.0}
+    >>> means.fit(["a", "b"], [1.0, 2.0, 3.0])
+    Traceback (most recent call last):
+    ...
+    ValueError: Got 2 keys, but 3 values.
+
+    Statistics of shards are merged key by key.
+
+    >>> variances = GroupedStatistic(Variance).fit(keys[:2], values[:2])
+    >>> variances += GroupedStatistic(Variance).fit(keys[2:], values[2:])
+    >>> variances.evaluate()
+    {'a': 8.666666666666666, 'b': 0.0, 'c': 0.0}
+
+    As with `Min` and `Max`, NaN is ignored by items and arrays alike.
+
+    >>> minima = GroupedStatistic(Min).fit(np.array([1, 1]), np.array([np.nan, 2.0]))
+    >>> minima.fit(2, np.nan).fit(2, 3.0).evaluate()
+    {1: 2.0, 2: 3.0}
+    """
+
+    def __init__(self, statistic_cls=Mean):
+        if statistic_cls not in _FIELDS:
+            names = ", ".join(cls.__name__ for cls in _FIELDS)
+            raise ValueError(f"The `statistic_cls` must be one of {names}.")
+        self.statistic_cls = statistic_cls
+        self.index_ = dict()
+        self.keys_ = []
+        self.arrays_ = {
+            field: np.full(0, value, dtype=type(value))
+            for (field, value) in _FIELDS[statistic_cls].items()
+        }
+
+    def fit(self, keys, values):
+        """
+        Fit an array of keys and an array of values, or a single key and value.
+        Strings are single keys. A single value is broadcast to every key of an
+        array, list or tuple.
+        """
+        if isinstance(keys, (str, bytes)):
+            self._fit_item(keys, values)
+            return self
+        if isinstance(keys, (list, tuple)):
+            # Keys of mixed types are not converted to an array
+            values = np.asarray(values, dtype=float)
+            if values.ndim and len(values) != len(keys):
+                err = f"Got {len(keys)} keys, but {len(values)} values."
+                raise ValueError(err)
+            self._fit_iterable(keys, np.broadcast_to(values, len(keys)).tolist())
+            return self
+        return super().fit(keys, values)
+
+    def _reserve(self, size):
+        """
+        Grow the state arrays to hold at least `size` keys, at least doubling
+        their length.
+        """
+        capacity = len(self.arrays_[next(iter(self.arrays_))])
+        if size <= capacity:
+            return None
+
+        capacity = max(size, 2 * capacity, 16)
+        for field, value in _FIELDS[self.statistic_cls].items():
+            array = self.arrays_[field]
+            grown = np.full(capacity, value, dtype=array.dtype)
+            grown[: len(array)] = array
+            self.arrays_[field] = grown
+
+    def _indices(self, keys):
+        """
+        Return the indices of the keys in a list, adding keys which are new.
+        """
+        index = self.index_
+        indices = []
+        for key in keys:
+            position = index.get(key)
+            if position is None:
+                position = index[key] = len(self.keys_)
+                self.keys_.append(key)
+            indices.append(position)
+        self._reserve(len(self.keys_))
+        return np.array(indices, dtype=np.intp)
+
+    def _fit_item(self, item, weight):
+        (position,) = self._indices([item])
+        arrays = self.arrays_
+
+        if self.statistic_cls is Min:
+            arrays["min"][position] = np.fmin(arrays["min"][position], weight)
+        elif self.statistic_cls is Max:
+            arrays["max"][position] = np.fmax(arrays["max"][position], weight)
+        else:
+            arrays["n"][position] += 1
+            delta = weight - arrays["mean"][position]
+            arrays["mean"][position] += delta / arrays["n"][position]
+            if self.statistic_cls is Variance:
+                arrays["var"][position] += delta * (weight - arrays["mean"][position])
+
+    def _fit_array(self, array, weights):
+        if not len(array):
+            return None
+
+        # Only the distinct keys of the batch are looked up in the key map
+        keys, inverse = np.unique(array, return_inverse=True)
+        positions = self._indices(keys.tolist())
+        arrays = self.arrays_
+
+        if self.statistic_cls is Min:
+            np.fmin.at(arrays["min"], positions[inverse], weights)
+            return None
+        if self.statistic_cls is Max:
+            np.fmax.at(arrays["max"], positions[inverse], weights)
+            return None
+
+        # The count, mean and sum of squared deviations of every key in the
+        # batch, using deviations from the current means for precision
+        counts = np.bincount(inverse, minlength=len(keys))
+        means = arrays["mean"][positions]
+        shifted = weights - means[inverse]
+        batch_means = means + np.bincount(inverse, shifted) / counts
+        batch_var = None
+        if self.statistic_cls is Variance:
+            deviations = weights - batch_means[inverse]
+            batch_var = np.bincount(inverse, deviations * deviations)
+        self._combine(positions, counts, batch_means, batch_var)
+
+    def _combine(self, positions, counts, means, var=None):
+        """
+        Fold the counts, means and sums of squared deviations of other batches
+        into the state of the keys at the given distinct positions, using the
+        pairwise update by Chan et al.
+        """
+        arrays = self.arrays_
+        n_a = arrays["n"][positions]
+        n_total = n_a + counts
+        delta = means - arrays["mean"][positions]
+
+        arrays["n"][positions] = n_total
+        arrays["mean"][positions] += delta * (counts / n_total)
+        if var is not None:
+            arrays["var"][positions] += var + delta ** 2 * (n_a * counts / n_total)
+
+    def merge(self, other):
+        self._check_mergeable(other, "statistic_cls")
+        if not other.keys_:
+            return self
+
+        positions = self._indices(other.keys_)
+        arrays = self.arrays_
+        others = {
+            field: array[: len(other.keys_)] for field, array in other.arrays_.items()
+        }
+
+        if self.statistic_cls is Min:
+            arrays["min"][positions] = np.fmin(arrays["min"][positions], others["min"])
+        elif self.statistic_cls is Max:
+            arrays["max"][positions] = np.fmax(arrays["max"][positions], others["max"])
+        else:
+            self._combine(positions, others["n"], others["mean"], others.get("var"))
+        return self
+
+    def _values(self, positions):
+        """
+        Return the statistic of the keys at the given positions.
+        """
+        arrays = self.arrays_
+        if self.statistic_cls is Min:
+            return arrays["min"][positions]
+        if self.statistic_cls is Max:
+            return arrays["max"][positions]
+        if self.statistic_cls is Mean:
+            return arrays["mean"][positions]
+        return arrays["var"][positions] / arrays["n"][positions]
+
+    def evaluate(self, key=None):
+        """
+        Return the statistic of a key, or a dict with the statistic of every
+        key if no key is given.
+        """
+        if key is not None:
+            return self._values(self.index_[key]).item()
+
+        values = self._values(np.arange(len(self.keys_)))
+        return dict(zip(self.keys_, values.tolist()))
+
+
+def main():
+    import pytest
+
+    pytest.main(
+        args=[".", "--doctest-modules", "-v", "--disable-warnings", "--capture=sys"]
+    )
+
+
+def timetest(n, num_keys=10 ** 5):
+    import time
+
+    generator = np.random.default_rng(123)
+    keys = generator.integers(num_keys, size=n)
+    values = generator.normal(size=n)
+
+    st = time.perf_counter()
+    grouped = GroupedStatistic(Variance)
+    for start in range(0, n, 2 ** 16):
+        grouped.fit(keys[start : start + 2 ** 16], values[start : start + 2 ** 16])
+    print(f"Chunked grouped variance: {time.perf_counter() - st:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
+
+    timetest(n=10 ** 7)
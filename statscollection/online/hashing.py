@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+64-bit hashing of items and arrays, for sketches of data streams.
+
+Numbers are hashed by mixing their 64 bit representation with the finalizer
+of the SplitMix64 generator, which is vectorized for NumPy arrays. Integers
+are hashed as 64 bit integers, and floats as 64 bit floats, so 1 and 1.0
+have different hashes. Other items, such as strings, are hashed using BLAKE2b.
+An item and an array holding it always give the same hash.
+
+http://prng.di.unimi.it/splitmix64.c
+"""
+import hashlib
+import numbers
+import struct
+import numpy as np
+
+_MASK = (1 << 64) - 1
+_GAMMA = 0x9E3779B97F4A7C15
+_MULTIPLIER_1 = 0xBF58476D1CE4E5B9
+_MULTIPLIER_2 = 0x94D049BB133111EB
+
+
+def hash_item(item):
+    """
+    Return the 64 bit hash of an item, as a Python integer.
+
+    Examples
+    --------
+    >>> hash_item(1) == hash_item(1)
+    True
+    >>> hash_item(1) == hash_item(1.0)
+    False
+    >>> import numpy as np
+    >>> hash_item("abc") == hash_array(np.array(["abc"])).item()
+    True
+
+    NumPy scalars are hashed as the Python items they hold.
+
+    >>> hash_item(np.bool_(True)) == hash_array(np.array([True])).item()
+    True
+    """
+    # NumPy scalars are converted as `tolist` converts the items of arrays
+    if isinstance(item, np.generic):
+        item = item.item()
+    if isinstance(item, numbers.Integral) and -(1 << 63) <= item <= _MASK:
+        return _mix(int(item) & _MASK)
+    if isinstance(item, numbers.Real):
+        (bits,) = struct.unpack("<Q", struct.pack("<d", float(item) + 0.0))
+        return _mix(bits)
+
+    if isinstance(item, str):
+        data = item.encode("utf-8")
+    elif isinstance(item, bytes):
+        data = item
+    else:
+        data = repr(item).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def hash_array(array):
+    """
+    Return the 64 bit hashes of the items in an array, as an array of type
+    np.uint64. Arrays of numbers are hashed in vectorized form.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> hashes = hash_array(np.array([1, 2, 3]))
+    >>> hashes.dtype
+    dtype('uint64')
+    >>> [hash_item(item) for item in [1, 2, 3]] == hashes.tolist()
+    True
+    """
+    array = np.asarray(array).ravel()
+    if array.dtype.kind in "biu":
+        return _mix_array(array.astype(np.int64).view(np.uint64))
+    if array.dtype.kind == "f":
+        return _mix_array((array.astype(np.float64) + 0.0).view(np.uint64))
+
+    hashes = (hash_item(item) for item in array.tolist())
+    return np.fromiter(hashes, dtype=np.uint64, count=len(array))
+
+
+def hash_indices(hashes, num_indices, size):
+    """
+    Return `num_indices` indices in range(size) for every hash, by double
+    hashing on the lower and upper 32 bits of the hashes, as in [1]_. The
+    result has shape (num_indices, len(hashes)).
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> hash_indices(hash_array(np.array([1, 2])), 3, 10).shape
+    (3, 2)
+
+    References
+    ----------
+    .. [1] A. Kirsch and M. Mitzenmacher, "Less Hashing, Same Performance:
+       Building a Better Bloom Filter", 2006
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    lower = hashes & np.uint64(0xFFFFFFFF)
+    upper = (hashes >> np.uint64(32)) | np.uint64(1)
+    steps = np.arange(num_indices, dtype=np.uint64)[:, np.newaxis]
+    return ((lower + steps * upper) % np.uint64(size)).astype(np.intp)
+
+
+def _mix(bits):
+    """
+    The SplitMix64 finalizer, on a Python integer of 64 bits.
+    """
+    z = (bits + _GAMMA) & _MASK
+    z = ((z ^ (z >> 30)) * _MULTIPLIER_1) & _MASK
+    z = ((z ^ (z >> 27)) * _MULTIPLIER_2) & _MASK
+    return z ^ (z >> 31)
+
+
+def _mix_array(bits):
+    """
+    The SplitMix64 finalizer, on an array of type np.uint64. Multiplications
+    wrap around modulo 2^64.
+    """
+    z = bits + np.uint64(_GAMMA)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(_MULTIPLIER_1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(_MULTIPLIER_2)
+    return z ^ (z >> np.uint64(31))
+
+
+def bit_length(array):
+    """
+    Return the number of bits needed to represent every item of an array of
+    unsigned integers. The upper and lower 32 bits are converted to floats
+    exactly, and the bit lengths are read from their binary exponents.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> bit_length(np.array([0, 1, 2, 255, 2 ** 63], dtype=np.uint64))
+    array([ 0,  1,  2,  8, 64], dtype=uint8)
+    """
+    array = np.asarray(array, dtype=np.uint64)
+    _, upper = np.frexp((array >> np.uint64(32)).astype(np.float64))
+    _, lower = np.frexp((array & np.uint64(0xFFFFFFFF)).astype(np.float64))
+    return np.where(upper > 0, upper + 32, lower).astype(np.uint8)
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main(
+        args=[".", "--doctest-modules", "-v", "--disable-warnings", "--capture=sys"]
+    )
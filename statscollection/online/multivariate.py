@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Online statistics of row vectors, i.e. of several variables at once.
+"""
+from .abstract_classes import OnlineStatistic, WeightedOnlineStatistic
+import numpy as np
+
+
+def _check_width(mean, other_mean):
+    """
+    Raise a ValueError if the mean vector of a batch of rows or another state
+    does not have the shape of the mean vector of the state.
+    """
+    if mean is not None and other_mean.shape != mean.shape:
+        err = f"Expected rows of shape {mean.shape}, got rows of shape {other_mean.shape}."
+        raise ValueError(err)
+
+
+def _check_fitted(mean):
+    """
+    Raise a ValueError if no rows have been fitted, so the number of
+    variables is not known.
+    """
+    if mean is None:
+        raise ValueError("No rows have been fitted yet.")
+
+
+class MultivariateMean(OnlineStatistic):
+    """
+    The arithmetic mean of row vectors.
+
+    A 1-D array is a single row, and a 2-D array is a batch of rows. Lists of
+    rows are fitted as a 2-D array, and iterables yield one row at a time.
+    The number of variables is given by the first row fitted.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> mean = MultivariateMean().fit(np.array([1.0, 2.0]))
+    >>> mean.fit(np.array([[3.0, 4.0], [5.0, 0.0]])).evaluate()
+    array([3., 2.])
+    >>> MultivariateMean().fit([[1, 2], [3, 4]]).evaluate()
+    array([2., 3.])
+
+    Rows of another width than the first row are rejected.
+
+    >>> mean.fit(np.array([5.0]))
+    Traceback (most recent call last):
+    ...
+    ValueError: Expected rows of shape (2,), got rows of shape (1,).
+    >>> MultivariateMean().evaluate()
+    Traceback (most recent call last):
+    ...
+    ValueError: No rows have been fitted yet.
+    """
+
+    def __init__(self):
+        self.n_ = 0
+        self.mean_ = None
+
+    def _fit_item(self, item):
+        self._fit_array(np.asarray(item, dtype=float))
+
+    def _fit_collection(self, collection):
+        self._fit_array(np.asarray(collection, dtype=float))
+
+    def _fit_array(self, array):
+        rows = np.atleast_2d(array)
+        if len(rows):
+            self._combine(len(rows), rows.mean(axis=0))
+
+    def _combine(self, n, mean):
+        """
+        Fold the count and mean vector of another batch into the state.
+        """
+        _check_width(self.mean_, mean)
+        if self.mean_ is None:
+            self.mean_ = np.zeros_like(mean, dtype=float)
+        self.n_ += n
+        self.mean_ += (mean - self.mean_) * (n / self.n_)
+
+    def merge(self, other):
+        self._check_mergeable(other)
+        if other.n_:
+            self._combine(other.n_, other.mean_)
+        return self
+
+    def evaluate(self):
+        _check_fitted(self.mean_)
+        return self.mean_.copy()
+
+
+class Covariance(OnlineStatistic):
+    """
+    The covariance or correlation matrix of row vectors.
+
+    The mean vector and the co-moment matrix, the sum of outer products of
+    deviations from the mean, are stored. Every batch of rows is centered at
+    its own mean, and its co-moment matrix is computed by a single matrix
+    product, i.e. a rank-k update using BLAS. It is combined with the state
+    by the pairwise update by Chan et al., generalized to matrices.
+
+    A 1-D array is a single row, and a 2-D array is a batch of rows. Lists of
+    rows are fitted as a 2-D array, and iterables yield one row at a time.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> rows = np.array([[1.0, 2.0], [2.0, 1.0], [3.0, 6.0]])
+    >>> covariance = Covariance().fit(rows[:1]).fit(rows[1:])
+    >>> covariance.evaluate()
+    array([[0.66666667, 1.33333333],
+           [1.33333333, 4.66666667]])
+    >>> covariance.evaluate(correlation=True)
+    array([[1.        , 0.75592895],
+           [0.75592895, 1.        ]])
+    >>> np.allclose(covariance.evaluate(), np.cov(rows.T, bias=True))
+    True
+    >>> Covariance().evaluate()
+    Traceback (most recent call last):
+    ...
+    ValueError: No rows have been fitted yet.
+    """
+
+    def __init__(self):
+        self.n_ = 0
+        self.mean_ = None
+        self.comoment_ = None
+
+    def _fit_item(self, item):
+        self._fit_array(np.asarray(item, dtype=float))
+
+    def _fit_collection(self, collection):
+        self._fit_array(np.asarray(collection, dtype=float))
+
+    def _fit_array(self, array):
+        rows = np.atleast_2d(array)
+        if not len(rows):
+            return None
+        mean = rows.mean(axis=0)
+        deviations = rows - mean
+        self._combine(len(rows), mean, deviations.T @ deviations)
+
+    def _combine(self, n, mean, comoment):
+        """
+        Fold the count, mean vector and co-moment matrix of another batch into
+        the state.
+        """
+        _check_width(self.mean_, mean)
+        if self.mean_ is None:
+            self.mean_ = np.zeros_like(mean, dtype=float)
+            self.comoment_ = np.zeros_like(comoment, dtype=float)
+
+        n_a, n_total = self.n_, self.n_ + n
+        delta = mean - self.mean_
+        self.comoment_ += comoment
+        self.comoment_ += np.outer(delta, delta * (n_a * n / n_total))
+        self.n_ = n_total
+        self.mean_ += delta * (n / n_total)
+
+    def merge(self, other):
+        self._check_mergeable(other)
+        if other.n_:
+            self._combine(other.n_, other.mean_, other.comoment_)
+        return self
+
+    def evaluate(self, correlation=False):
+        """
+        Return the covariance matrix, normalized by the number of rows as in
+        `Variance`, or the correlation matrix if `correlation` is True.
+        """
+        _check_fitted(self.mean_)
+        covariance = self.comoment_ / self.n_
+        if correlation:
+            scale = np.sqrt(np.diag(covariance))
+            return covariance / np.outer(scale, scale)
+        return covariance
+
+
+class OnlineRegression(WeightedOnlineStatistic):
+    """
+    Linear least squares regression, fitted to rows of features and targets.
+
+    The features `X` and targets `y` are fitted in pairs, like items and
+    weights, e.g. ``fit(X, y)`` with a 2-D array `X` and a 1-D array `y`. A
+    1-D array `X` with a scalar `y` is a single row, and scalars fit a single
+    feature. The sufficient statistics are the weighted means and co-moment
+    matrix of the features and the target, i.e. the centered X'X and X'y,
+    which are updated for every batch with a single matrix product and merged
+    as in `Covariance`. The coefficients are only solved for on `evaluate`.
+
+    With a `forgetting` factor below 1, the weight of every row decays by that
+    factor for every later row, as in recursive least squares with
+    exponential forgetting, so the regression follows a changing trend.
+
+    Parameters
+    ----------
+    fit_intercept : bool
+        Whether to fit an intercept.
+    forgetting : float
+        The forgetting factor, between 0 and 1. 1 means no forgetting.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> X = np.array([[0.0, 1.0], [1.0, 0.0], [2.0, 2.0], [3.0, 1.0]])
+    >>> y = 1 + 2 * X[:, 0] - X[:, 1]
+    >>> regression = OnlineRegression().fit(X[:2], y[:2]).fit(X[2], y[2])
+    >>> regression.fit(X[3:], y[3:]).evaluate()
+    array([ 1.,  2., -1.])
+    >>> regression.predict(np.array([[4.0, 0.0]]))
+    array([9.])
+
+    Lists are rows as well, and rows with another number of features are
+    rejected.
+
+    >>> regression.fit([1.0, 1.0], 2.0).evaluate()
+    array([ 1.,  2., -1.])
+    >>> regression.fit([1.0, 2.0, 3.0], 4.0)
+    Traceback (most recent call last):
+    ...
+    ValueError: Expected 2 features, got 3.
+    >>> OnlineRegression().evaluate()
+    Traceback (most recent call last):
+    ...
+    ValueError: No rows have been fitted yet.
+
+    With forgetting, the regression follows a trend which changes.
+
+    >>> x = np.arange(100.0)
+    >>> y = np.where(x < 50, x, 100 - x)
+    >>> OnlineRegression(forgetting=0.8).fit(x, y).evaluate().round(1)
+    array([100.,  -1.])
+    """
+
+    def __init__(self, fit_intercept=True, forgetting=1.0):
+        self.fit_intercept = fit_intercept
+        self.forgetting = forgetting
+        self.n_ = 0
+        self.w_ = 0.0
+
+        # The target is the last variable
+        self.mean_ = None
+        self.comoment_ = None
+        self.coefficients_ = None
+
+    def fit(self, X, y):
+        if isinstance(X, (list, tuple)):
+            X = np.asarray(X, dtype=float)
+        if isinstance(X, np.ndarray) and X.ndim == 1 and np.ndim(y) == 0:
+            self._fit_item(X, y)
+            return self
+        return super().fit(X, y)
+
+    def _fit_item(self, item, weight):
+        row = np.append(np.asarray(item, dtype=float), weight)
+        self._fit_rows(row[np.newaxis])
+
+    def _fit_array(self, array, weights):
+        self._fit_rows(np.column_stack((array.reshape(len(array), -1), weights)))
+
+    def _fit_rows(self, rows):
+        """
+        Fit rows of features followed by the target.
+        """
+        if not len(rows):
+            return None
+
+        # The weights of the rows, which decay for every later row
+        decay = self.forgetting ** np.arange(len(rows) - 1, -1, -1.0)
+        w = decay.sum()
+        mean = decay @ rows / w
+        deviations = rows - mean
+        comoment = (deviations * decay[:, np.newaxis]).T @ deviations
+        self._combine(len(rows), w, mean, comoment)
+
+    def _combine(self, n, w, mean, comoment):
+        """
+        Fold the number of rows, the total weight, the means and co-moments of
+        another batch of rows into the state, after decaying the state.
+        """
+        if self.mean_ is not None and mean.shape != self.mean_.shape:
+            err = f"Expected {len(self.mean_) - 1} features, got {len(mean) - 1}."
+            raise ValueError(err)
+        if self.mean_ is None:
+            self.mean_ = np.zeros_like(mean)
+            self.comoment_ = np.zeros_like(comoment)
+
+        decay = self.forgetting ** n
+        self.w_ *= decay
+        self.comoment_ *= decay
+
+        w_a, w_total = self.w_, self.w_ + w
+        delta = mean - self.mean_
+        self.comoment_ += comoment
+        self.comoment_ += np.outer(delta, delta * (w_a * w / w_total))
+        self.n_ += n
+        self.w_ = w_total
+        self.mean_ += delta * (w / w_total)
+        self.coefficients_ = None
+
+    def merge(self, other):
+        self._check_mergeable(other, "fit_intercept", "forgetting")
+        if other.n_:
+            self._combine(other.n_, other.w_, other.mean_, other.comoment_)
+        return self
+
+    def evaluate(self):
+        """
+        Return the coefficients, preceded by the intercept if it is fitted.
+        Least squares solutions are found with `np.linalg.lstsq`, so features
+        which are constant or collinear give the minimum norm solution.
+        """
+        _check_fitted(self.mean_)
+        if self.coefficients_ is None:
+            mean_x, mean_y = self.mean_[:-1], self.mean_[-1]
+            xx, xy = self.comoment_[:-1, :-1], self.comoment_[:-1, -1]
+
+            if self.fit_intercept:
+                coefficients = np.linalg.lstsq(xx, xy, rcond=None)[0]
+                intercept = mean_y - mean_x @ coefficients
+                self.coefficients_ = np.concatenate(([intercept], coefficients))
+            else:
+                xx = xx + self.w_ * np.outer(mean_x, mean_x)
+                xy = xy + self.w_ * mean_x * mean_y
+                self.coefficients_ = np.linalg.lstsq(xx, xy, rcond=None)[0]
+
+        return self.coefficients_.copy()
+
+    def predict(self, X):
+        """
+        Return the predicted targets for a 2-D array of features.
+        """
+        coefficients = self.evaluate()
+        X = np.asarray(X, dtype=float).reshape(len(X), -1)
+        if self.fit_intercept:
+            return coefficients[0] + X @ coefficients[1:]
+        return X @ coefficients
+
+
+def main():
+    import pytest
+
+    pytest.main(
+        args=[".", "--doctest-modules", "-v", "--disable-warnings", "--capture=sys"]
+    )
+
+
+def timetest(n, dim=200):
+    import time
+
+    data = np.random.default_rng(123).normal(size=(n, dim))
+
+    st = time.perf_counter()
+    covariance = Covariance()
+    for start in range(0, n, 2 ** 12):
+        covariance.fit(data[start : start + 2 ** 12])
+    print(f"Chunked covariance: {time.perf_counter() - st:.3f}s")
+    print(np.abs(covariance.evaluate() - np.cov(data.T, bias=True)).max())
+
+
+if __name__ == "__main__":
+    main()
+
+    timetest(n=10 ** 6)
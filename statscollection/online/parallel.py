@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fitting online statistics on shards of large arrays in parallel processes.
+"""
+import concurrent.futures
+import mmap
+import os
+import numpy as np
+from .abstract_classes import _chunks
+
+
+def parallel_fit(statistic_factory, data, n_workers=None, chunksize=2 ** 20):
+    """
+    Fit a statistic on a large array by fitting shards in parallel processes.
+
+    The array is split into `n_workers` contiguous shards. A fresh statistic
+    is created for every shard by calling `statistic_factory`, and fitted in
+    a separate process. The partial statistics are then merged in order.
+
+    Statistics with a `spawn` method, such as `Sample`, are created once and
+    spawned into one statistic per shard, with independent random streams.
+    Other random statistics are created by calling the factory for every
+    shard, so a factory with a fixed seed gives every shard the same stream.
+
+    Memory-mapped arrays are not sent to the workers. Instead every worker
+    opens the file by path and reads its own shard, so the data is never
+    pickled or copied between processes. Other arrays are pickled shard by
+    shard, and so are views into memory-mapped arrays.
+
+    Parameters
+    ----------
+    statistic_factory : callable
+        Returns a new statistic supporting `merge`, e.g. `Mean` or
+        `functools.partial(CentralMoments, order_max=4)`. Must be picklable,
+        so lambda functions can not be used.
+    data : np.ndarray or np.memmap
+        The data. Shards are taken along the first axis.
+    n_workers : int
+        The number of worker processes. Defaults to the number of CPUs.
+    chunksize : int
+        Every worker fits its shard in chunks of this many items, bounding the
+        memory used by temporary arrays in the batch path.
+
+    Returns
+    -------
+    OnlineStatistic
+        The merged statistic.
+
+    Examples
+    --------
+    >>> import functools
+    >>> import numpy as np
+    >>> from statscollection.online.classes import Mean, CentralMoments
+    >>> data = np.arange(10, dtype=float)
+    >>> parallel_fit(Mean, data, n_workers=2).evaluate()
+    4.5
+    >>> factory = functools.partial(CentralMoments, order_max=3)
+    >>> parallel_fit(factory, data, n_workers=3).evaluate()[2]
+    82.5
+
+    Samplers of the shards draw from independent random streams.
+
+    >>> from statscollection.online.sampling import Sample
+    >>> factory = functools.partial(Sample, num_samples=4, random_state=0)
+    >>> np.sort(parallel_fit(factory, np.arange(400), n_workers=4).evaluate())
+    array([175, 205, 287, 327])
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    bounds = np.linspace(0, len(data), num=n_workers + 1).astype(int)
+    shards = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    statistic = statistic_factory()
+    if hasattr(statistic, "spawn"):
+        statistics = statistic.spawn(n_workers)
+    else:
+        statistics = [statistic] + [statistic_factory() for _ in shards[1:]]
+
+    # Memory-mapped files are reopened by path in the workers. Only memmaps
+    # backed directly by a mmap know their offset into the file.
+    if isinstance(data, np.memmap) and isinstance(data.base, mmap.mmap):
+        order = "F" if np.isfortran(data) else "C"
+        source = (data.filename, data.dtype, data.shape, data.offset, order)
+        tasks = [
+            (statistic, source, start, stop)
+            for statistic, (start, stop) in zip(statistics, shards)
+        ]
+    else:
+        tasks = [
+            (statistic, data[start:stop])
+            for statistic, (start, stop) in zip(statistics, shards)
+        ]
+
+    if n_workers == 1:
+        statistics = [_fit_shard(*task, chunksize=chunksize) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(n_workers) as executor:
+            futures = [
+                executor.submit(_fit_shard, *task, chunksize=chunksize)
+                for task in tasks
+            ]
+            statistics = [future.result() for future in futures]
+
+    statistic = statistics[0]
+    for other in statistics[1:]:
+        statistic.merge(other)
+    return statistic
+
+
+def _fit_shard(statistic, data, start=None, stop=None, chunksize=2 ** 20):
+    """
+    Fit an unfitted statistic on a shard. Runs in a worker process.
+
+    If `start` and `stop` are given, `data` describes a memory-mapped file as
+    a tuple (filename, dtype, shape, offset, order), which is opened here.
+    """
+    if start is not None:
+        filename, dtype, shape, offset, order = data
+        data = np.memmap(
+            filename, dtype=dtype, mode="r", offset=offset, shape=shape, order=order
+        )[start:stop]
+
+    for chunk in _chunks(data, chunksize):
+        statistic.fit(np.asarray(chunk))
+    return statistic
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main(
+        args=[".", "--doctest-modules", "-v", "--disable-warnings", "--capture=sys"]
+    )
@@ -13,9 +13,11 @@ http://code.activestate.com/recipes/576930-efficient-running-median-using-an-ind
 https://rhettinger.wordpress.com/2010/02/06/lost-knowledge/
 https://epubs.siam.org/doi/pdf/10.1137/1.9781611972740.53
 """
-import random
-from .abstract_classes import OnlineStatistic
-from scipy import stats
+import collections
+import heapq
+import itertools
+import math
+from .abstract_classes import OnlineStatistic, WeightedOnlineStatistic
 import numpy as np
 
 
@@ -31,7 +33,11 @@ class Sample(OnlineStatistic):
     will be replaced by a newly seen item as it iterates over the data stream.
     
     Two different algorithms are implemented: one for sampling without
-    replacement [1]_ and one for sampling with replacements [2]_. 
+    replacement [1]_ [3]_ and one for sampling with replacements [2]_. Both
+    draw the number of items to skip before the reservoir changes directly,
+    so skipped items cost almost nothing. Arrays and lists are fitted by
+    indexing directly into the items which change the reservoir, and
+    iterators skip items without looking at them.
     
     Parameters
     ----------
@@ -39,37 +45,37 @@ class Sample(OnlineStatistic):
         The number of samples to keep in the reservoir.
     replace : bool
         Whether or not sampling is with replacement. 
+    random_state : None, int, np.random.SeedSequence or np.random.Generator
+        The source of randomness. Random numbers are drawn from the generator
+        in blocks, which are used one number at a time.
 
     Examples
     --------
     
-    >>> import random
-    >>> import numpy as np
-    >>> random.seed(123)  # The algorithm is stochastic. Seed to reproduce.
-    >>> np.random.seed(123)
     >>> stream = [1, 2, 3, 4, 5]
     
     When sampling without replacement, the reservoir will fill up gradually.
+    The algorithm is stochastic, so we set the random state to reproduce it.
     
-    >>> sampler = Sample(num_samples=3, replace=False)
+    >>> sampler = Sample(num_samples=3, replace=False, random_state=123)
     >>> for sample in sampler.yield_from(stream):
     ...   print(sample)
     [1]
     [1, 2]
     [1, 2, 3]
-    [4, 2, 3]
-    [4, 2, 5]
+    [1, 4, 3]
+    [1, 4, 3]
     
     When sampling with replacement, the reservoir will fill up immediately.
     
-    >>> sampler = Sample(num_samples=10, replace=True)
+    >>> sampler = Sample(num_samples=10, replace=True, random_state=123)
     >>> for sample in sampler.yield_from(stream):
     ...   print(sample)
     [1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-    [2, 2, 1, 1, 2, 1, 2, 1, 1, 1]
-    [3, 2, 1, 1, 2, 1, 3, 1, 1, 1]
-    [3, 2, 1, 1, 2, 4, 3, 1, 4, 4]
-    [5, 2, 5, 1, 2, 5, 3, 1, 4, 4]
+    [2, 2, 1, 1, 1, 2, 1, 1, 2, 1]
+    [3, 2, 1, 3, 1, 2, 1, 1, 2, 1]
+    [3, 2, 1, 3, 4, 2, 1, 1, 2, 1]
+    [3, 2, 1, 3, 4, 2, 1, 1, 2, 1]
     
     References
     ----------
@@ -80,70 +86,441 @@ class Sample(OnlineStatistic):
            Nagiza & Geist, Al. (2004). *Reservoir-Based Random Sampling with 
            Replacement from Data Stream*. 
            doi>10.1137/1.9781611972740.53. 
+    .. [3] Kim-Hung Li. *Reservoir-Sampling Algorithms of Time Complexity
+           O(n(1 + log(N/n)))*. ACM Transactions on Mathematical Software
+           (TOMS), 1994. doi>10.1145/198429.198435
 
     """
 
-    def __init__(self, num_samples=10, replace=False):
+    def __init__(self, num_samples=10, replace=False, random_state=None):
         self.num_samples = num_samples
+        self.replace = replace
+        self.random_state = random_state
+        self.seed_sequence_ = _seed_sequence(random_state)
+        self.generator_ = np.random.default_rng(self.seed_sequence_ or random_state)
+        self._uniform = _UniformBuffer(self.generator_)
         self.samples = []
         self.seen_items_ = 0
         # self.indices_ = list(range(num_samples))
 
+        # The number of seen items when the reservoir is next changed
+        self.next_item_ = 1
+
         # Use different functions depending on whether we draw with replacement
         if replace:
-            self._fit_item = self._fit_item_with_replacement
+            self._replace = self._replace_with_replacement
         else:
-            self._fit_item = self._fit_item_without_replacement
+            self._replace = self._replace_without_replacement
+            self.threshold_ = 1.0
 
     def _fit_item(self, item):
-        err = "Fitting is dependent on whether sampling is with replacements."
-        raise NotImplementedError(err)
-
-    def _fit_item_without_replacement(self, item):
         self.seen_items_ += 1
 
+        # Skip the item if the reservoir is not to be changed
+        if self.seen_items_ < self.next_item_:
+            return None
+
+        self._replace(item)
+
+    def _fit_collection(self, iterable):
+        if isinstance(iterable, (collections.abc.Sequence, np.ndarray)):
+            self._fit_sequence(iterable)
+        else:
+            self._fit_iterable(iterable)
+
+    def _fit_sequence(self, sequence):
+        """
+        Fit a sequence, such as a list or an array, by indexing directly into
+        the items which change the reservoir. For memory-mapped arrays only
+        these items are read.
+        """
+        seen_items = self.seen_items_
+        stop = seen_items + len(sequence)
+        while self.next_item_ <= stop:
+            self.seen_items_ = self.next_item_
+            self._replace(sequence[self.next_item_ - seen_items - 1])
+
+        self.seen_items_ = stop
+
+    def _fit_iterable(self, iterable):
+        """
+        Fit an iterable by consuming the skipped items without looking at
+        them, counting them as they are consumed.
+        """
+        iterator = iter(iterable)
+        while True:
+            skip = self.next_item_ - self.seen_items_ - 1
+            counter = itertools.count()
+            skipped = zip(itertools.islice(iterator, skip), counter)
+            collections.deque(skipped, maxlen=0)
+            self.seen_items_ += next(counter)
+
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return None
+
+            self.seen_items_ += 1
+            self._replace(item)
+
+    def _replace_without_replacement(self, item):
+        """
+        Put the item with number `seen_items_` into the reservoir, and draw the
+        number of the next item to change the reservoir.
+
+        This is Algorithm L by Li. The items have uniform random keys, and the
+        reservoir holds the items with the smallest keys. The largest of these
+        keys, `threshold_`, determines the distribution of the number of items
+        to skip before another key is smaller.
+        """
         # If the reservoir is not filled up yet, append the item to the list
         if len(self.samples) < self.num_samples:
             self.samples.append(item)
+            if len(self.samples) < self.num_samples:
+                self.next_item_ = self.seen_items_ + 1
+                return None
         else:
-            # Generate a random index to possibly insert into
-            random_index = random.randrange(self.seen_items_)
-            # If the generated value is lower enough, accept the item
-            if random_index < self.num_samples:
-                self.samples[random_index] = item
+            self.samples[int(self._uniform() * self.num_samples)] = item
 
-    def _fit_item_with_replacement(self, item):
-        self.seen_items_ += 1
+        uniform = 1 - self._uniform()
+        self.threshold_ *= math.exp(math.log(uniform) / self.num_samples)
+        self._skip_without_replacement()
 
-        # How many times to sample
-        # TODO: Timing shows that ~90% of the time is spent below.
-        # I must go back to the paper and implement the skipping algorithm.
-        res = stats.binom(n=self.num_samples, p=1 / self.seen_items_).rvs(1)
-        num_times = np.asscalar(res)
+    def _skip_without_replacement(self):
+        """
+        Draw the number of the next item to change a full reservoir. The
+        number of skipped items is geometric, with success probability
+        `threshold_`.
+        """
+        uniform = 1 - self._uniform()
+        skip = math.log(uniform) / math.log1p(-self.threshold_)
+        self.next_item_ = self.seen_items_ + int(min(skip, 2 ** 62)) + 1
 
+    def _replace_with_replacement(self, item):
+        """
+        Replace positions in the reservoir by the item with number
+        `seen_items_`, given that at least one position is to be replaced.
+        Then draw the number of the next item to change the reservoir.
+
+        Every position is an independent reservoir of size one, replaced with
+        probability p = 1 / seen_items_. The first replaced position follows a
+        geometric distribution truncated to the reservoir, and the following
+        ones are found by geometric jumps.
+        """
         # If the reservoir is not filled up yet, fill it up immediately
         if not self.samples:
             self.samples = [item] * self.num_samples
+            self._skip_with_replacement()
             return None
 
+        log_q = math.log1p(-1 / self.seen_items_)
+        truncation = -math.expm1(self.num_samples * log_q)
+        index = int(math.log1p(-self._uniform() * truncation) / log_q)
+
+        while index < self.num_samples:
+            self.samples[index] = item
+            index += 1 + int(math.log(1 - self._uniform()) / log_q)
+
+        self._skip_with_replacement()
+
+    def _skip_with_replacement(self):
+        """
+        Draw the number of the next item to change the reservoir.
+
+        With t items seen, the probability that none of the items up to item j
+        replace any of the k positions is (t / j)^k, which is inverted.
+        """
+        uniform = 1 - self._uniform()
+        skip = self.seen_items_ / uniform ** (1 / self.num_samples)
+        self.next_item_ = int(min(skip, 2 ** 62)) + 1
+
+    def merge(self, other):
+        """
+        Merge the reservoir of another sampler into this one.
+
+        The merged reservoir is distributed as if a single sampler had seen
+        the items seen by both samplers.
+
+        Examples
+        --------
+        >>> sampler = Sample(num_samples=3, random_state=1).fit([1, 2, 3, 4])
+        >>> sampler += Sample(num_samples=3, random_state=2).fit([5, 6, 7, 8, 9, 10])
+        >>> sampler.seen_items_
+        10
+        >>> len(sampler.evaluate())
+        3
+        """
+        self._check_mergeable(other, "num_samples", "replace")
+        if self.replace:
+            self.samples = _merge_reservoirs_with_replacement(
+                self.samples,
+                self.seen_items_,
+                other.samples,
+                other.seen_items_,
+                self.generator_,
+            )
         else:
+            self.samples = _merge_reservoirs(
+                self.samples,
+                self.seen_items_,
+                other.samples,
+                other.seen_items_,
+                self.num_samples,
+                self.generator_,
+            )
+        self.seen_items_ += other.seen_items_
 
-            # If no sample is the reservoir is to be replaced, return
-            if num_times == 0:
-                return None
+        # The distance to the next change only depends on the number of items
+        # seen, and without replacement on the largest key in the reservoir.
+        # That key is the k-th smallest of t uniform keys, which is beta.
+        if self.replace and self.samples:
+            self._skip_with_replacement()
+        elif len(self.samples) < self.num_samples:
+            self.next_item_ = self.seen_items_ + 1
+        elif not self.replace:
+            k, t = self.num_samples, self.seen_items_
+            self.threshold_ = self.generator_.beta(k, t - k + 1)
+            self._skip_without_replacement()
+        return self
 
-            # Find random indices, and replace the reservoir items.
-            # We use numpy since random.choices samples with replacement, which
-            # is not what we want in this case.
+    def spawn(self, n):
+        """
+        Return `n` new samplers with the same parameters and independent
+        random streams, e.g. for sampling shards of a data stream in parallel
+        and merging the results. The streams are spawned from the seed
+        sequence of this sampler, so the results are reproducible. If the
+        sampler was given a generator, the seed sequence is seeded from it.
 
-            random_indices = random.sample(range(self.num_samples), k=num_times)
-            for index in random_indices:
-                self.samples[index] = item
+        Examples
+        --------
+        >>> shards = Sample(num_samples=3, random_state=42).spawn(2)
+        >>> shards[0].fit([1, 2, 3, 4, 5]).evaluate()
+        [1, 2, 4]
+        >>> shards[1].fit([6, 7, 8, 9, 10]).evaluate()
+        [6, 10, 8]
+        >>> shards[0].merge(shards[1]).evaluate()
+        [6, 10, 1]
+        """
+        return [
+            type(self)(self.num_samples, self.replace, child)
+            for child in _spawn_seed_sequences(self.seed_sequence_, self.generator_, n)
+        ]
 
     def evaluate(self):
         return self.samples
 
 
+class WeightedSample(WeightedOnlineStatistic):
+    """
+    Sample with probabilities proportional to weights from an iterable of
+    unknown length, without replacement.
+
+    Every item gets a random key u^(1 / w), where u is uniform and w is the
+    weight of the item, and the reservoir holds the ``num_samples`` items with
+    the largest keys [1]_. The keys are stored in a heap, as logarithms. With
+    exponential jumps, the total weight of the items to skip before the
+    reservoir changes is drawn directly, so random numbers are only drawn
+    when the reservoir changes. When fitting arrays, the items which change
+    the reservoir are found by searching the cumulative sum of the weights.
+
+    Parameters
+    ----------
+    num_samples : int
+        The number of samples to keep in the reservoir.
+    random_state : None, int, np.random.SeedSequence or np.random.Generator
+        The source of randomness.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> sampler = WeightedSample(num_samples=2, random_state=1)
+    >>> sampler = sampler.fit(["a", "b", "c", "d"], [1, 1, 1, 100])
+    >>> "d" in sampler.evaluate()
+    True
+    >>> items = np.arange(1000)
+    >>> sampler = WeightedSample(num_samples=5, random_state=1)
+    >>> np.sort(sampler.fit(items, items > 990).evaluate())
+    array([991, 992, 993, 995, 998])
+
+    References
+    ----------
+    .. [1] Pavlos S. Efraimidis & Paul G. Spirakis. *Weighted random sampling
+           with a reservoir*. Information Processing Letters, 2006.
+           doi>10.1016/j.ipl.2005.11.003
+    """
+
+    def __init__(self, num_samples=10, random_state=None):
+        self.num_samples = num_samples
+        self.random_state = random_state
+        self.generator_ = np.random.default_rng(random_state)
+        self._uniform = _UniformBuffer(self.generator_)
+        self.seen_items_ = 0
+
+        # A heap of (log key, item number, item), the smallest key on top
+        self.heap_ = []
+        self.weight_to_skip_ = 0.0
+
+    def _fit_item(self, item, weight):
+        self.seen_items_ += 1
+
+        # If the reservoir is not filled up yet, push the item to the heap.
+        # Items with no weight are never sampled.
+        if len(self.heap_) < self.num_samples:
+            if weight > 0:
+                log_key = math.log(1 - self._uniform()) / weight
+                heapq.heappush(self.heap_, (log_key, self.seen_items_, item))
+                if len(self.heap_) == self.num_samples:
+                    self._skip()
+            return None
+
+        self.weight_to_skip_ -= weight
+        if self.weight_to_skip_ <= 0:
+            self._replace(item, weight)
+
+    def _fit_array(self, array, weights):
+        # Fill up the reservoir item by item
+        start = 0
+        while len(self.heap_) < self.num_samples and start < len(array):
+            self._fit_item(array[start], weights[start].item())
+            start += 1
+
+        # Search the cumulative weights for the items changing the reservoir
+        seen_items = self.seen_items_
+        cumulative = np.cumsum(weights[start:])
+        skipped = 0.0
+        index = int(np.searchsorted(cumulative, self.weight_to_skip_))
+        while index < len(cumulative):
+            self.seen_items_ = seen_items + index + 1
+            skipped = cumulative[index].item()
+            self._replace(array[start + index], weights[start + index].item())
+            target = skipped + self.weight_to_skip_
+            index = int(np.searchsorted(cumulative, target))
+
+        if len(cumulative):
+            self.weight_to_skip_ -= cumulative[-1].item() - skipped
+        self.seen_items_ = seen_items + len(cumulative)
+
+    def _replace(self, item, weight):
+        """
+        Replace the item with the smallest key by an item which is known to
+        get a larger key, and draw the weight to skip until the next change.
+        """
+        # The key u^(1 / w) is uniform on (t^w, 1) given that it is above t
+        threshold = math.exp(weight * self.heap_[0][0])
+        key = threshold + (1 - threshold) * self._uniform()
+        log_key = math.log(key) / weight
+        heapq.heapreplace(self.heap_, (log_key, self.seen_items_, item))
+        self._skip()
+
+    def _skip(self):
+        """
+        Draw the total weight of the items to skip before the reservoir
+        changes. The probability of no key above t among items with total
+        weight W is t^W, so the weight is exponential.
+        """
+        log_threshold = self.heap_[0][0]
+        if log_threshold < 0:
+            self.weight_to_skip_ = math.log(1 - self._uniform()) / log_threshold
+        else:
+            self.weight_to_skip_ = math.inf
+
+    def merge(self, other):
+        """
+        Merge the reservoir of another sampler into this one, by keeping the
+        items with the largest keys from both.
+        """
+        self._check_mergeable(other, "num_samples")
+        heap = heapq.nlargest(self.num_samples, self.heap_ + other.heap_)
+        heapq.heapify(heap)
+        self.heap_ = heap
+        self.seen_items_ += other.seen_items_
+        if len(self.heap_) == self.num_samples:
+            self._skip()
+        return self
+
+    def evaluate(self):
+        return [item for (log_key, number, item) in self.heap_]
+
+
+class _UniformBuffer:
+    """
+    Draws uniform random numbers in [0, 1) from a NumPy Generator in blocks of
+    `size` numbers, and returns them one at a time when called. This amortizes
+    the overhead of calling the generator over many numbers.
+    """
+
+    def __init__(self, generator, size=4096):
+        self.generator = generator
+        self.size = size
+        self.numbers = []
+
+    def __call__(self):
+        if not self.numbers:
+            self.numbers = self.generator.random(self.size).tolist()
+        return self.numbers.pop()
+
+
+def _seed_sequence(random_state):
+    """
+    Return the seed sequence for a random state, or None for a generator,
+    since the seed sequence of a generator is not public in every version of
+    NumPy.
+    """
+    if isinstance(random_state, np.random.Generator):
+        return None
+    if isinstance(random_state, np.random.SeedSequence):
+        return random_state
+    return np.random.SeedSequence(random_state)
+
+
+def _spawn_seed_sequences(seed_sequence, generator, n):
+    """
+    Return `n` children of a seed sequence. Without a seed sequence, i.e. when
+    a sampler was given a generator, the parent is seeded from the generator.
+    """
+    if seed_sequence is None:
+        entropy = generator.integers(2 ** 63, size=4).tolist()
+        seed_sequence = np.random.SeedSequence(entropy)
+    return seed_sequence.spawn(n)
+
+
+def _merge_reservoirs(samples_a, seen_a, samples_b, seen_b, num_samples, generator):
+    """
+    Merge two reservoirs of uniform samples without replacement.
+
+    The number of items kept from the first reservoir is hypergeometric, since
+    the merged reservoir is a uniform sample from the union of the streams.
+    """
+    size = min(num_samples, seen_a + seen_b)
+    if not size:
+        return []
+
+    num_a = int(generator.hypergeometric(ngood=seen_a, nbad=seen_b, nsample=size))
+    indices_a = generator.choice(len(samples_a), size=num_a, replace=False)
+    indices_b = generator.choice(len(samples_b), size=size - num_a, replace=False)
+    merged = [samples_a[i] for i in indices_a] + [samples_b[i] for i in indices_b]
+    return [merged[i] for i in generator.permutation(size)]
+
+
+def _merge_reservoirs_with_replacement(samples_a, seen_a, samples_b, seen_b, generator):
+    """
+    Merge two reservoirs of uniform samples with replacement.
+
+    Every position in a reservoir is an independent sample of size one, so
+    position-by-position the item from the first reservoir is kept with
+    probability proportional to the number of items it has seen.
+    """
+    if not samples_a or not samples_b:
+        return list(samples_a or samples_b)
+
+    prob_a = seen_a / (seen_a + seen_b)
+    uniforms = generator.random(len(samples_a)).tolist()
+    return [
+        item_a if uniform < prob_a else item_b
+        for (item_a, item_b, uniform) in zip(samples_a, samples_b, uniforms)
+    ]
+
+
 def main():
     import pytest
 
@@ -155,9 +532,7 @@ def main():
 def timetest(n):
     stream = iter(range(n))
 
-    np.random.seed(123)
-    random.seed(123)
-    estimator = Sample(num_samples=n, replace=True)
+    estimator = Sample(num_samples=n, replace=True, random_state=123)
     import time
 
     st = time.perf_counter()
@@ -0,0 +1,921 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sketches, i.e. approximate summaries of data streams in bounded memory.
+
+https://arxiv.org/abs/1603.05346
+https://research.google/pubs/pub40671/
+https://arxiv.org/abs/1702.01284
+http://dimacs.rutgers.edu/~graham/pubs/papers/cm-full.pdf
+https://www.cs.ucsb.edu/sites/default/files/documents/2005-23.pdf
+https://en.wikipedia.org/wiki/Bloom_filter
+"""
+import heapq
+import itertools
+import math
+import numbers
+from .abstract_classes import OnlineStatistic
+from .hashing import hash_item, hash_array, hash_indices, bit_length
+from .sampling import _UniformBuffer
+import numpy as np
+
+
+class QuantileSketch(OnlineStatistic):
+    """
+    Approximate quantiles of a data stream in bounded memory.
+
+    This is the KLL sketch by Karnin, Lang and Liberty [1]_. Items are stored
+    in a hierarchy of compactors, where an item in level h represents 2^h
+    items of the stream. When a level exceeds its capacity it is sorted, and
+    every other item, starting at a random offset, is promoted to the next
+    level. The capacity is `k` at the top level, and decreases geometrically
+    by a factor 2/3 towards the lower levels. The memory used is O(k), and the
+    rank error is about 1.7 / k.
+
+    Arrays are appended to the lowest level in one step, and compacted with
+    vectorized sorts. Sketches of shards of a stream can be merged.
+
+    Parameters
+    ----------
+    k : int
+        The capacity of the top level, which controls the accuracy.
+    random_state : int or np.random.Generator
+        Seeds the offsets of the compactions.
+
+    Examples
+    --------
+    While the stream is shorter than the capacity, the quantiles are exact.
+
+    >>> for median in QuantileSketch().yield_from([5, 1, 4, 2, 3]):
+    ...   print(median)
+    5.0
+    1.0
+    4.0
+    2.0
+    3.0
+
+    Longer streams are summarized approximately, in bounded memory.
+
+    >>> import numpy as np
+    >>> sketch = QuantileSketch(k=200, random_state=42)
+    >>> sketch = sketch.fit(np.arange(1_000_000))
+    >>> sketch.evaluate(np.array([0.5, 0.999])) / 1_000_000
+    array([0.5..., 0.99...])
+    >>> sketch.num_retained() < 1000
+    True
+
+    References
+    ----------
+    .. [1] Z. Karnin, K. Lang and E. Liberty, "Optimal Quantile Approximation
+       in Streams", 2016, https://arxiv.org/abs/1603.05346
+    """
+
+    def __init__(self, k=200, random_state=None):
+        self.k = k
+        self.random_state = random_state
+        self.generator_ = np.random.default_rng(random_state)
+        # One random bit is needed per compaction, so few numbers are buffered
+        self._uniform = _UniformBuffer(self.generator_, size=64)
+        self.n_ = 0
+        self.buffer_ = []
+        self.compactors_ = [np.empty(0)]
+
+    def _capacity(self, level):
+        """
+        Return the capacity of the given level.
+        """
+        depth = len(self.compactors_) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _fit_item(self, item):
+        self.buffer_.append(item)
+        self.n_ += 1
+        if len(self.buffer_) >= self._capacity(0):
+            self._flush()
+
+    def _fit_array(self, array):
+        if not len(array):
+            return None
+        self._flush()
+        self.compactors_[0] = np.concatenate((self.compactors_[0], array))
+        self.n_ += len(array)
+        self._compress()
+
+    def _flush(self):
+        """
+        Move the items fitted one at a time to the lowest level.
+        """
+        if self.buffer_:
+            items = np.array(self.buffer_, dtype=float)
+            self.compactors_[0] = np.concatenate((self.compactors_[0], items))
+            self.buffer_ = []
+            self._compress()
+
+    def _compress(self):
+        """
+        Compact every level which exceeds its capacity, from the lowest level.
+        """
+        level = 0
+        while level < len(self.compactors_):
+            items = self.compactors_[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.compactors_):
+                    self.compactors_.append(np.empty(0))
+
+                # Keep the largest item if there is an odd number of items
+                items = np.sort(items)
+                keep = len(items) % 2
+                promoted = items[int(self._uniform() * 2) : len(items) - keep : 2]
+                self.compactors_[level] = items[len(items) - keep :]
+                above = self.compactors_[level + 1]
+                self.compactors_[level + 1] = np.concatenate((above, promoted))
+            level += 1
+
+    def num_retained(self):
+        """
+        Return the number of items stored in the sketch.
+        """
+        return len(self.buffer_) + sum(len(items) for items in self.compactors_)
+
+    def merge(self, other):
+        self._check_mergeable(other, "k")
+        self._flush()
+        other._flush()
+
+        for level, items in enumerate(other.compactors_):
+            if level == len(self.compactors_):
+                self.compactors_.append(np.empty(0))
+            self.compactors_[level] = np.concatenate((self.compactors_[level], items))
+
+        self.n_ += other.n_
+        self._compress()
+        return self
+
+    def evaluate(self, q=0.5):
+        """
+        Return the q-th quantile, or an array of quantiles if `q` is an array.
+        The quantile is the smallest stored item whose weighted rank is at
+        least q times the number of items.
+        """
+        self._flush()
+        items = np.concatenate(self.compactors_)
+        weights = np.concatenate(
+            [np.full(len(level), 2 ** h) for (h, level) in enumerate(self.compactors_)]
+        )
+
+        order = np.argsort(items, kind="stable")
+        items = items[order]
+        ranks = np.cumsum(weights[order])
+
+        if not len(items):
+            quantiles = np.full(np.shape(q), np.nan)
+        else:
+            indices = np.searchsorted(ranks, np.asarray(q) * ranks[-1], side="left")
+            quantiles = items[np.minimum(indices, len(items) - 1)]
+
+        if isinstance(q, numbers.Number):
+            return quantiles.item()
+        return quantiles
+
+
+class DistinctCount(OnlineStatistic):
+    """
+    Approximate count of distinct items in bounded memory.
+
+    This is HyperLogLog++ [1]_. Items are hashed to 64 bits. The first `p`
+    bits of a hash select one of m = 2^p registers, which keeps the largest
+    number of leading zeros, plus one, seen in the remaining bits. Registers
+    are stored in an array of type np.uint8.
+
+    While few items are seen, the sketch uses a sparse representation with
+    precision 25: sorted pairs of register index and value are stored, and
+    the count is estimated by linear counting, which is almost exact. The
+    sketch is converted to registers when the pairs would use more memory.
+    The count is estimated from the registers with the improved estimator by
+    Ertl [2]_, which is unbiased over the whole range of counts without the
+    empirical bias correction of HyperLogLog++.
+
+    The relative standard error is about 1.04 / sqrt(m). Arrays of numbers are
+    hashed in vectorized form, and sketches of shards can be merged.
+
+    Parameters
+    ----------
+    p : int
+        The precision, between 4 and 18. The registers use 2^p bytes.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> distinct = DistinctCount()
+    >>> round(distinct.fit(np.arange(1000) % 100).evaluate())
+    100
+    >>> round(distinct.fit(["a", "b", "a", 3]).evaluate())
+    102
+
+    Many distinct items are counted with registers of 2^p bytes.
+
+    >>> distinct = DistinctCount(p=14).fit(np.arange(1_000_000))
+    >>> abs(distinct.evaluate() / 1_000_000 - 1) < 0.03
+    True
+    >>> distinct.registers_.nbytes
+    16384
+
+    References
+    ----------
+    .. [1] S. Heule, M. Nunkesser and A. Hall, "HyperLogLog in Practice:
+       Algorithmic Engineering of a State of The Art Cardinality Estimation
+       Algorithm", 2013, https://research.google/pubs/pub40671/
+    .. [2] O. Ertl, "New cardinality estimation algorithms for HyperLogLog
+       sketches", 2017, https://arxiv.org/abs/1702.01284
+    """
+
+    _SPARSE_P = 25
+
+    def __init__(self, p=14):
+        if not 4 <= p <= 18:
+            raise ValueError("The precision `p` must be between 4 and 18.")
+        self.p = p
+        self.buffer_ = []
+        self.sparse_ = np.empty(0, dtype=np.uint32)
+        self.registers_ = None
+
+    def _fit_item(self, item):
+        hashed = hash_item(item)
+        if self.registers_ is None:
+            self.buffer_.append(hashed)
+            if len(self.buffer_) >= 2 ** self.p // 4:
+                self._flush()
+        else:
+            index = hashed >> (64 - self.p)
+            remaining = (hashed << self.p) & 0xFFFFFFFFFFFFFFFF
+            rank = min(65 - remaining.bit_length(), 65 - self.p)
+            if rank > self.registers_[index]:
+                self.registers_[index] = rank
+
+    def _fit_array(self, array):
+        self._flush()
+        self._add_hashes(hash_array(array))
+
+    def _flush(self):
+        """
+        Add the hashes of the items fitted one at a time.
+        """
+        if self.buffer_:
+            hashes = np.array(self.buffer_, dtype=np.uint64)
+            self.buffer_ = []
+            self._add_hashes(hashes)
+
+    def _add_hashes(self, hashes):
+        # While sparse, hashes are added in chunks no larger than the maximal
+        # number of pairs, so that large arrays switch to registers early
+        chunksize = 2 ** self.p // 4
+        while self.registers_ is None and len(hashes):
+            chunk, hashes = hashes[:chunksize], hashes[chunksize:]
+
+            # Pairs are encoded as index << 6 | rank, which fits in 31 bits
+            index, rank = _ranks(chunk, self._SPARSE_P)
+            pairs = (index.astype(np.uint32) << np.uint32(6)) | rank
+            self._set_sparse(np.concatenate((self.sparse_, pairs)))
+
+        if len(hashes):
+            index, rank = _ranks(hashes, self.p)
+            np.maximum.at(self.registers_, index, rank)
+
+    def _set_sparse(self, pairs):
+        """
+        Store the given pairs, or convert to registers if four bytes per pair
+        use more memory than the registers.
+        """
+        self.sparse_ = _largest_ranks(pairs)
+        if len(self.sparse_) > 2 ** self.p // 4:
+            self.registers_ = self._dense_registers()
+            self.sparse_ = np.empty(0, dtype=np.uint32)
+
+    def _dense_registers(self):
+        """
+        Return the registers, converting the sparse representation if needed.
+        """
+        if self.registers_ is not None:
+            return self.registers_
+
+        # The bits of the sparse index beyond the first p are the first bits
+        # used to count leading zeros
+        extra_bits = self._SPARSE_P - self.p
+        sparse_index = self.sparse_ >> np.uint32(6)
+        sparse_rank = (self.sparse_ & np.uint32(63)).astype(np.uint8)
+        extra = sparse_index & np.uint32((1 << extra_bits) - 1)
+        rank = np.where(
+            extra != 0,
+            extra_bits + 1 - bit_length(extra).astype(np.int64),
+            extra_bits + sparse_rank.astype(np.int64),
+        )
+
+        registers = np.zeros(2 ** self.p, dtype=np.uint8)
+        np.maximum.at(registers, sparse_index >> np.uint32(extra_bits), rank)
+        return registers
+
+    def merge(self, other):
+        self._check_mergeable(other, "p")
+        self._flush()
+        other._flush()
+
+        if self.registers_ is None and other.registers_ is None:
+            self._set_sparse(np.concatenate((self.sparse_, other.sparse_)))
+        else:
+            registers = self._dense_registers()
+            self.registers_ = np.maximum(registers, other._dense_registers())
+            self.sparse_ = np.empty(0, dtype=np.uint32)
+        return self
+
+    def evaluate(self):
+        self._flush()
+
+        # Linear counting with precision 25, on the pairs of the sparse index
+        if self.registers_ is None:
+            m = 2 ** self._SPARSE_P
+            return m * math.log(m / (m - len(self.sparse_)))
+
+        m, q = len(self.registers_), 64 - self.p
+        counts = np.bincount(self.registers_, minlength=q + 2).tolist()
+        z = m * _tau(1 - counts[q + 1] / m)
+        for count in reversed(counts[1 : q + 1]):
+            z = 0.5 * (z + count)
+        z += m * _sigma(counts[0] / m)
+        return m * m / (2 * math.log(2) * z)
+
+
+def _ranks(hashes, p):
+    """
+    Return the register indices given by the first `p` bits of the hashes, and
+    the number of leading zeros of the remaining bits plus one.
+    """
+    index = hashes >> np.uint64(64 - p)
+    remaining = hashes << np.uint64(p)
+    rank = np.minimum(65 - bit_length(remaining).astype(np.int64), 65 - p)
+    return index, rank.astype(np.uint8)
+
+
+def _largest_ranks(pairs):
+    """
+    Return the sorted unique pairs with the largest rank for every index.
+    """
+    pairs = np.unique(pairs)
+    index = pairs >> np.uint32(6)
+    last = np.ones(len(pairs), dtype=bool)
+    last[:-1] = index[1:] != index[:-1]
+    return pairs[last]
+
+
+def _sigma(x):
+    if x == 1:
+        return float("inf")
+    y, z = 1.0, x
+    while True:
+        x *= x
+        z_old = z
+        z += x * y
+        y += y
+        if z == z_old:
+            return z
+
+
+def _tau(x):
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        z_old = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == z_old:
+            return z / 3
+
+
+class CountMinSketch(OnlineStatistic):
+    """
+    Approximate counts of items in bounded memory.
+
+    This is the Count-Min sketch by Cormode and Muthukrishnan [1]_. Every
+    item is hashed to one counter in each of `depth` rows of a table of
+    counters, which are incremented. The count of an item is estimated by the
+    smallest of its counters. Estimates are never too small, and are at most
+    e / width times the number of items too large, with probability at least
+    1 - exp(-depth).
+
+    With `conservative`, the counters of an item are only increased as far as
+    needed for its smallest counter to reach the new estimate, which reduces
+    the overestimation. Arrays are counted in vectorized form: with
+    conservative updates, every distinct item of an array is counted at once,
+    so the counters may differ slightly from fitting the items one at a time,
+    but estimates are still never too small. Use `count` to look up the
+    estimated counts of items.
+
+    Parameters
+    ----------
+    width : int
+        The number of counters in every row.
+    depth : int
+        The number of rows, i.e. the number of hashes of every item.
+    conservative : bool
+        Whether to use conservative updates.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> sketch = CountMinSketch(width=1000, depth=4)
+    >>> sketch = sketch.fit(np.array([1, 1, 2, 3, 1]))
+    >>> sketch.count(1)
+    3
+    >>> sketch.count(np.array([1, 2, 4]))
+    array([3, 1, 0])
+    >>> sketch.evaluate()
+    5
+
+    References
+    ----------
+    .. [1] G. Cormode and S. Muthukrishnan, "An Improved Data Stream Summary:
+       The Count-Min Sketch and its Applications", 2005,
+       http://dimacs.rutgers.edu/~graham/pubs/papers/cm-full.pdf
+    """
+
+    def __init__(self, width=2048, depth=4, conservative=False):
+        self.width = width
+        self.depth = depth
+        self.conservative = conservative
+        self.n_ = 0
+        self.table_ = np.zeros((depth, width), dtype=np.int64)
+
+    def _fit_item(self, item):
+        columns = hash_indices(hash_item(item), self.depth, self.width)[:, 0]
+        rows = np.arange(self.depth)
+        if self.conservative:
+            estimate = self.table_[rows, columns].min() + 1
+            np.maximum.at(self.table_, (rows, columns), estimate)
+        else:
+            self.table_[rows, columns] += 1
+        self.n_ += 1
+
+    def _fit_array(self, array):
+        if not len(array):
+            return None
+        hashes = hash_array(array)
+        if self.conservative:
+            hashes, counts = np.unique(hashes, return_counts=True)
+
+        columns = hash_indices(hashes, self.depth, self.width)
+        rows = np.arange(self.depth)[:, np.newaxis]
+        if self.conservative:
+            estimates = self.table_[rows, columns].min(axis=0) + counts
+            np.maximum.at(self.table_, (rows, columns), estimates)
+        else:
+            np.add.at(self.table_, (rows, columns), 1)
+        self.n_ += len(array)
+
+    def merge(self, other):
+        self._check_mergeable(other, "width", "depth", "conservative")
+        self.table_ += other.table_
+        self.n_ += other.n_
+        return self
+
+    def count(self, item):
+        """
+        Return the estimated count of an item, or an array of estimated counts
+        if `item` is an array of items.
+        """
+        if isinstance(item, np.ndarray):
+            columns = hash_indices(hash_array(item), self.depth, self.width)
+            rows = np.arange(self.depth)[:, np.newaxis]
+            return self.table_[rows, columns].min(axis=0)
+
+        columns = hash_indices(hash_item(item), self.depth, self.width)[:, 0]
+        return self.table_[np.arange(self.depth), columns].min().item()
+
+    def evaluate(self):
+        """
+        Return the number of items counted.
+        """
+        return self.n_
+
+
+class TopK(OnlineStatistic):
+    """
+    The most frequent items of a data stream, in bounded memory.
+
+    This is the Space-Saving algorithm by Metwally et al. [1]_. At most `k`
+    items are monitored with a count and a maximal overestimation error. An
+    item which is not monitored replaces an item with the smallest count, and
+    takes over its count as error. Every item with a frequency above n / k is
+    monitored, and counts are at most n / k too large.
+
+    The monitored items are kept in a stream-summary: items are grouped in
+    buckets of equal count, so every item is counted in O(1) time. Arrays are
+    counted in vectorized form, and merged into the summary as in the
+    mergeable summaries by Agarwal et al. [2]_. Summaries of shards can also
+    be merged this way.
+
+    Parameters
+    ----------
+    k : int
+        The number of monitored items.
+
+    Examples
+    --------
+    >>> top = TopK(k=3).fit("abracadabra")
+    >>> top.evaluate()
+    [('a', 5), ('b', 3), ('r', 3)]
+    >>> top.errors_["b"]
+    2
+    >>> import numpy as np
+    >>> TopK(k=2).fit(np.array([3, 1, 3, 2, 3, 1])).evaluate()
+    [(3, 3), (1, 2)]
+
+    References
+    ----------
+    .. [1] A. Metwally, D. Agrawal and A. El Abbadi, "Efficient Computation
+       of Frequent and Top-k Elements in Data Streams", 2005
+    .. [2] P. Agarwal, G. Cormode, Z. Huang, J. Phillips, Z. Wei and K. Yi,
+       "Mergeable Summaries", 2012
+    """
+
+    def __init__(self, k=10):
+        self.k = k
+        self.n_ = 0
+        self.counts_ = dict()
+        self.errors_ = dict()
+
+        # Buckets of monitored items by count. Dicts are used as ordered sets.
+        self.buckets_ = dict()
+        self.min_count_ = 0
+
+    def _fit_item(self, item):
+        self.n_ += 1
+        count = self.counts_.get(item)
+        if count is not None:
+            self._increment(item, count)
+            return None
+
+        if len(self.counts_) < self.k:
+            count = self.errors_[item] = 0
+            self.min_count_ = 0
+        else:
+            # Replace the oldest item with the smallest count
+            count = self.min_count_
+            bucket = self.buckets_[count]
+            replaced = next(iter(bucket))
+            del bucket[replaced], self.counts_[replaced], self.errors_[replaced]
+            self.errors_[item] = count
+
+        self.counts_[item] = count
+        self.buckets_.setdefault(count, dict())[item] = None
+        self._increment(item, count)
+
+    def _increment(self, item, count):
+        """
+        Move an item from the bucket of its count to the next bucket.
+        """
+        bucket = self.buckets_[count]
+        del bucket[item]
+        if not bucket:
+            del self.buckets_[count]
+            if count == self.min_count_:
+                self.min_count_ = count + 1
+
+        self.counts_[item] = count + 1
+        self.buckets_.setdefault(count + 1, dict())[item] = None
+
+    def _fit_array(self, array):
+        if not len(array):
+            return None
+        items, counts = np.unique(array, return_counts=True)
+
+        # The exact counts of the k most frequent items. Items which are left
+        # out have counts of at most the largest count left out.
+        order = np.argsort(-counts, kind="stable")
+        bound = counts[order[self.k]].item() if len(order) > self.k else 0
+        order = order[: self.k]
+        counts = dict(zip(items[order].tolist(), counts[order].tolist()))
+        self._combine(counts, dict.fromkeys(counts, 0), bound)
+        self.n_ += len(array)
+
+    def _bound(self):
+        """
+        Return the largest possible count of an item which is not monitored.
+        """
+        return self.min_count_ if len(self.counts_) == self.k else 0
+
+    def _combine(self, counts, errors, bound):
+        """
+        Combine the summary with the counts and errors of another summary, in
+        which the items that are not monitored have counts of at most `bound`.
+        The k items with the largest combined counts are kept.
+        """
+        own_bound = self._bound()
+        combined_counts, combined_errors = dict(), dict()
+        for item in itertools.chain(self.counts_, counts):
+            if item in combined_counts:
+                continue
+            combined_counts[item] = self.counts_.get(item, own_bound) + counts.get(
+                item, bound
+            )
+            combined_errors[item] = self.errors_.get(item, own_bound) + errors.get(
+                item, bound
+            )
+
+        kept = heapq.nlargest(self.k, combined_counts, key=combined_counts.get)
+        self.counts_ = {item: combined_counts[item] for item in kept}
+        self.errors_ = {item: combined_errors[item] for item in kept}
+
+        self.buckets_ = dict()
+        for item in reversed(kept):
+            self.buckets_.setdefault(self.counts_[item], dict())[item] = None
+        self.min_count_ = min(self.buckets_) if self.buckets_ else 0
+
+    def merge(self, other):
+        self._check_mergeable(other, "k")
+        self._combine(other.counts_, other.errors_, other._bound())
+        self.n_ += other.n_
+        return self
+
+    def evaluate(self):
+        """
+        Return a list of the monitored items and their counts, most frequent
+        first. Counts of an item are at most ``errors_[item]`` too large.
+        """
+        items = sorted(self.counts_, key=self.counts_.get, reverse=True)
+        return [(item, self.counts_[item]) for item in items]
+
+
+def _bloom_size(capacity, error_rate):
+    """
+    Return the number of bits and hashes of a Bloom filter which holds
+    `capacity` items with a false positive rate of `error_rate`.
+    """
+    if not 0 < error_rate < 1:
+        raise ValueError("The `error_rate` must be between 0 and 1.")
+    num_bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    num_hashes = max(int(round(num_bits / capacity * math.log(2))), 1)
+    return num_bits, num_hashes
+
+
+def _item_indices(hashed, num_hashes, size):
+    """
+    The indices of `hash_indices`, for a single hash given as a Python integer.
+    """
+    lower, upper = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+    return [(lower + step * upper) % size for step in range(num_hashes)]
+
+
+def _estimate_items(num_set, num_bits, num_hashes):
+    """
+    Estimate the number of distinct items in a Bloom filter from the number
+    of bits set, as in Swamidass and Baldi.
+    """
+    if num_set == num_bits:
+        return float("inf")
+    return -num_bits / num_hashes * math.log1p(-num_set / num_bits)
+
+
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+_HEADER = np.dtype([("capacity", "<u8"), ("error_rate", "<f8")])
+
+
+class BloomFilter(OnlineStatistic):
+    """
+    Approximate set membership in bounded memory.
+
+    A Bloom filter sets `num_hashes` bits for every item in an array of
+    `num_bits` bits. An item is possibly in the set if all its bits are set,
+    and certainly not in the set otherwise. The sizes are chosen so that the
+    false positive rate is `error_rate` after `capacity` distinct items.
+
+    The bits are packed in an array of type np.uint8. The bit indices of an
+    item are computed by double hashing, in vectorized form for arrays. Use
+    `contains_many` to look up many items at once. Filters of shards are
+    merged by taking the union of their bits, and filters can be saved to a
+    file and memory-mapped when loaded, without reading the file.
+
+    Parameters
+    ----------
+    capacity : int
+        The number of distinct items the filter is designed for.
+    error_rate : float
+        The false positive rate when the filter holds `capacity` items.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    >>> bloom = bloom.fit(np.array([1, 2, 3])).fit(["a", "b"])
+    >>> 2 in bloom, 4 in bloom, "a" in bloom
+    (True, False, True)
+    >>> bloom.contains_many(np.array([3, 4, 5]))
+    array([ True, False, False])
+    >>> round(bloom.evaluate())
+    5
+
+    Deduplicate events before fitting another statistic.
+
+    >>> from statscollection.online.classes import Mean
+    >>> events = np.array([1.0, 3.0, 2.0, 3.0, 1.0])
+    >>> bloom = BloomFilter(capacity=1000, error_rate=0.01).fit(events[:2])
+    >>> Mean().fit(events[2:][~bloom.contains_many(events[2:])]).evaluate()
+    2.0
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits, self.num_hashes = _bloom_size(capacity, error_rate)
+        self.bits_ = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    def _fit_item(self, item):
+        bits = self.bits_
+        for index in _item_indices(hash_item(item), self.num_hashes, self.num_bits):
+            bits[index >> 3] |= 1 << (index & 7)
+
+    def _fit_array(self, array):
+        indices = hash_indices(hash_array(array), self.num_hashes, self.num_bits)
+        masks = np.left_shift(1, indices & 7).astype(np.uint8)
+        np.bitwise_or.at(self.bits_, indices >> 3, masks)
+
+    def __contains__(self, item):
+        bits = self.bits_
+        indices = _item_indices(hash_item(item), self.num_hashes, self.num_bits)
+        return all(bits[index >> 3] >> (index & 7) & 1 for index in indices)
+
+    def contains_many(self, array):
+        """
+        Return a boolean array, which is True where an item is possibly in the
+        set, and False where it is certainly not.
+        """
+        indices = hash_indices(hash_array(array), self.num_hashes, self.num_bits)
+        bits = (self.bits_[indices >> 3] >> (indices & 7).astype(np.uint8)) & 1
+        return bits.all(axis=0)
+
+    def merge(self, other):
+        self._check_mergeable(other, "capacity", "error_rate")
+        np.bitwise_or(self.bits_, other.bits_, out=self.bits_)
+        return self
+
+    def evaluate(self):
+        """
+        Return the estimated number of distinct items in the filter.
+        """
+        num_set = _POPCOUNT[self.bits_].sum(dtype=np.int64).item()
+        return _estimate_items(num_set, self.num_bits, self.num_hashes)
+
+    def save(self, path):
+        """
+        Save the filter to a file, as a header of 16 bytes followed by the bits.
+        """
+        header = np.array([(self.capacity, self.error_rate)], dtype=_HEADER)
+        with open(path, "wb") as file:
+            file.write(header.tobytes())
+            file.write(self.bits_.tobytes())
+
+    @classmethod
+    def load(cls, path, mode="r"):
+        """
+        Load a filter saved by `save`. The bits are memory-mapped, so they are
+        read from the file when needed. With mode "r+", fitting the filter
+        writes to the file.
+        """
+        header = np.fromfile(path, dtype=_HEADER, count=1)[0]
+        bloom = cls(int(header["capacity"]), float(header["error_rate"]))
+        bloom.bits_ = np.memmap(
+            path,
+            dtype=np.uint8,
+            mode=mode,
+            offset=_HEADER.itemsize,
+            shape=bloom.bits_.shape,
+        )
+        return bloom
+
+
+class CountingBloomFilter(OnlineStatistic):
+    """
+    Approximate set membership, with removal of items.
+
+    A counting Bloom filter replaces every bit of a Bloom filter by a counter,
+    stored in an array of type np.uint8. Fitting an item increments its
+    counters, and `remove` decrements them. Counters saturate at 255, and
+    saturated counters are never decremented, so removals never cause false
+    negatives. Arrays are counted in vectorized form, and filters of shards
+    are merged by adding the counters.
+
+    Parameters
+    ----------
+    capacity : int
+        The number of distinct items the filter is designed for.
+    error_rate : float
+        The false positive rate when the filter holds `capacity` items.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> bloom = CountingBloomFilter(capacity=1000, error_rate=0.01)
+    >>> bloom = bloom.fit(np.array([1, 2, 3, 3]))
+    >>> bloom = bloom.remove(np.array([2, 3]))
+    >>> bloom.contains_many(np.array([1, 2, 3]))
+    array([ True, False,  True])
+    >>> 3 in bloom.remove(3)
+    False
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits, self.num_hashes = _bloom_size(capacity, error_rate)
+        self.counters_ = np.zeros(self.num_bits, dtype=np.uint8)
+
+    def _fit_item(self, item):
+        self._update(np.array(self._indices_of(item)), 1)
+
+    def _fit_array(self, array):
+        self._update(self._indices_of(array), 1)
+
+    def _indices_of(self, items):
+        if isinstance(items, np.ndarray):
+            hashes = hash_array(items)
+            return hash_indices(hashes, self.num_hashes, self.num_bits).ravel()
+        return _item_indices(hash_item(items), self.num_hashes, self.num_bits)
+
+    def _update(self, indices, sign):
+        """
+        Add `sign` times the number of occurrences of every index to the
+        counters, saturating at 255. Saturated counters are not decremented.
+        """
+        # Counting all counters is faster than sorting many indices
+        if len(indices) > self.num_bits // 16:
+            counts = np.bincount(indices, minlength=self.num_bits)
+            indices = np.flatnonzero(counts)
+            counts = counts[indices]
+        else:
+            indices, counts = np.unique(indices, return_counts=True)
+
+        counters = self.counters_[indices].astype(np.int64)
+        updated = np.clip(counters + sign * counts, 0, 255)
+        self.counters_[indices] = np.where(counters == 255, 255, updated)
+
+    def remove(self, items):
+        """
+        Remove an item, or an array of items, which were fitted before.
+        """
+        if not isinstance(items, np.ndarray):
+            items = np.array([items], dtype=object)
+        self._update(self._indices_of(items), -1)
+        return self
+
+    def __contains__(self, item):
+        return all(self.counters_[self._indices_of(item)])
+
+    def contains_many(self, array):
+        """
+        Return a boolean array, which is True where an item is possibly in the
+        set, and False where it is certainly not.
+        """
+        indices = hash_indices(hash_array(array), self.num_hashes, self.num_bits)
+        return (self.counters_[indices] > 0).all(axis=0)
+
+    def merge(self, other):
+        self._check_mergeable(other, "capacity", "error_rate")
+        counters = self.counters_.astype(np.int64) + other.counters_
+        self.counters_ = np.minimum(counters, 255).astype(np.uint8)
+        return self
+
+    def evaluate(self):
+        """
+        Return the estimated number of distinct items in the filter.
+        """
+        num_set = np.count_nonzero(self.counters_)
+        return _estimate_items(num_set, self.num_bits, self.num_hashes)
+
+
+def main():
+    import pytest
+
+    pytest.main(
+        args=[".", "--doctest-modules", "-v", "--disable-warnings", "--capture=sys"]
+    )
+
+
+def timetest(n):
+    import time
+
+    data = np.random.default_rng(123).normal(size=n)
+
+    st = time.perf_counter()
+    sketch = QuantileSketch(k=200, random_state=123)
+    for chunk in np.array_split(data, max(n // 2 ** 16, 1)):
+        sketch.fit(chunk)
+    print(f"Chunked ingestion: {time.perf_counter() - st:.3f}s")
+
+    q = np.array([0.001, 0.5, 0.999])
+    print(sketch.evaluate(q), np.quantile(data, q), sketch.num_retained())
+
+
+if __name__ == "__main__":
+    main()
+
+    timetest(n=10 ** 7)
@@ -16,39 +16,916 @@ https://epubs.siam.org/doi/pdf/10.1137/1.9781611972740.53
 
 import random
 import collections
+import math
+import numbers
 from .abstract_classes import OnlineStatistic
+import numpy as np
+from scipy import signal
+from .classes import _pascal_matrix, _central_moments, _combine_central_moments
+from .sampling import (
+    _merge_reservoirs,
+    _seed_sequence,
+    _spawn_seed_sequences,
+    _UniformBuffer,
+)
+
+
+class _RingBuffer:
+    """
+    The last `n` items of a stream, stored in a NumPy array of fixed size and
+    data type. The next item overwrites the oldest one.
+    """
+
+    def __init__(self, n, dtype=float):
+        self.array = np.zeros(n, dtype=dtype)
+        self.position = 0
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def append(self, item):
+        """
+        Append an item, and return the item it pushed out, or None.
+        """
+        position = self.position
+        removed = None
+        if self.length == len(self.array):
+            removed = self.array.item(position)
+        else:
+            self.length += 1
+
+        self.array[position] = item
+        self.position = position + 1 if position + 1 < len(self.array) else 0
+        return removed
+
+    def extend(self, items):
+        """
+        Append an array of items, and return an array of the items which were
+        pushed out of the window, oldest first. If more than `n` items are
+        appended, this includes the first of the appended items.
+        """
+        n, m = len(self.array), len(items)
+        num_removed = max(self.length + m - n, 0)
+        oldest = (self.position - self.length) % n
+        removed = self.array.take(np.arange(oldest, oldest + num_removed), mode="wrap")
+        removed = np.concatenate((removed[: self.length], items[: max(m - n, 0)]))
+
+        # Write the items which remain, in at most two slices
+        items = items[-n:]
+        first = min(len(items), n - self.position)
+        self.array[self.position : self.position + first] = items[:first]
+        self.array[: len(items) - first] = items[first:]
+
+        self.position = (self.position + len(items)) % n
+        self.length = min(self.length + m, n)
+        return removed
+
+    def window(self):
+        """
+        Return the items in the window as an array, oldest first.
+        """
+        if self.length < len(self.array):
+            return self.array[: self.length].copy()
+        return np.concatenate(
+            (self.array[self.position :], self.array[: self.position])
+        )
 
 
 class WindowedMean(OnlineStatistic):
     """
     A windowed mean.
 
+    The items in the window are kept in a NumPy array used as a ring buffer.
+    The sum is updated using compensated summation, and is recomputed exactly
+    once every `n` items, so that it does not drift over long streams.
+
+    Parameters
+    ----------
+    n : int
+        The length of the window.
+    dtype : data-type
+        The data type of the ring buffer.
+
     Examples
     --------
-    >>> 1 + 1
+    >>> for mean in WindowedMean(n=2).yield_from([1, 2, 3, 4]):
+    ...   print(mean)
+    1.0
+    1.5
+    2.5
+    3.5
+
+    Arrays advance the window by all their items at once.
+
+    >>> import numpy as np
+    >>> WindowedMean(n=3).fit(np.arange(10)).evaluate()
+    8.0
+
+    Items are added to the sum as they are stored in the buffer, e.g. as
+    integers with ``dtype=int``.
+
+    >>> for mean in WindowedMean(n=2, dtype=int).yield_from([1.5, 2.5, 3.5]):
+    ...   print(mean)
+    1.0
+    1.5
+    2.5
+    """
+
+    def __init__(self, n=10, dtype=float):
+        self.n = n
+        self.dtype = dtype
+        self.window_length_ = 0
+        self.sum_ = 0.0
+        self.compensation_ = 0.0
+        self.updates_ = 0
+        self.buffer_ = _RingBuffer(n, dtype=dtype)
+
+    def _fit_item(self, item):
+        # Add the new value as stored in the buffer, and remove the past value
+        buffer = self.buffer_
+        removed = buffer.append(item)
+        self._add(buffer.array.item(buffer.position - 1))
+        if removed is not None:
+            self._add(-removed)
+
+        self.window_length_ = len(self.buffer_)
+        self._count_updates(1)
+
+    def _fit_array(self, array):
+        # Cast first, so the values added are the values later removed
+        array = array.astype(self.buffer_.array.dtype, copy=False)
+        removed = self.buffer_.extend(array)
+        self._add(np.sum(array).item())
+        self._add(-np.sum(removed).item())
+
+        self.window_length_ = len(self.buffer_)
+        self._count_updates(len(array))
+
+    def _add(self, value):
+        """
+        Add a value to the sum, using Neumaier's compensated summation.
+        """
+        total = self.sum_ + value
+        if abs(self.sum_) >= abs(value):
+            self.compensation_ += (self.sum_ - total) + value
+        else:
+            self.compensation_ += (value - total) + self.sum_
+        self.sum_ = total
+
+    def _count_updates(self, updates):
+        """
+        Recompute the sum of the window exactly once every `n` updates.
+        """
+        self.updates_ += updates
+        if self.updates_ >= self.n:
+            window = self.buffer_.array[: self.window_length_]
+            self.sum_ = math.fsum(window.tolist())
+            self.compensation_ = 0.0
+            self.updates_ = 0
+
+    def merge(self, other):
+        """
+        Fit the items in the window of `other`, which updates the sum.
+        """
+        self._check_mergeable(other, "n")
+        self._fit_array(other.buffer_.window())
+        return self
+
+    def evaluate(self):
+        return (self.sum_ + self.compensation_) / self.window_length_
+
+
+class WindowedVariance(OnlineStatistic):
+    """
+    A windowed variance.
+
+    The items in the window are kept in a ring buffer. When a new item pushes
+    out the oldest one, the mean and the sum of squared deviations are updated
+    in a single step, as in Welford's algorithm. To bound the cancellation
+    error of the removals, both are recomputed exactly from the window once
+    every `n` items.
+
+    Arrays advance the window in one step: the array is added and the items
+    pushed out are removed, using the pairwise update by Chan et al. with a
+    negative count. If the array is longer than the window, the variance is
+    recomputed from the window.
+
+    Parameters
+    ----------
+    n : int
+        The length of the window.
+
+    Examples
+    --------
+    >>> for var in WindowedVariance(n=2).yield_from([1, 3, 4, 8]):
+    ...   print(var)
+    0.0
+    1.0
+    0.25
+    4.0
+    >>> import numpy as np
+    >>> WindowedVariance(n=3).fit(np.array([5, 1, 2, 3, 4])).evaluate()
+    0.666666666666...
+    """
+
+    def __init__(self, n=10):
+        self.n = n
+        self.n_ = 0
+        self.mean_ = 0.0
+        self.var_ = 0.0
+        self.updates_ = 0
+        self.buffer_ = _RingBuffer(n)
+
+    def _fit_item(self, item):
+        removed = self.buffer_.append(item)
+        if removed is None:
+            self.n_ += 1
+            delta = item - self.mean_
+            self.mean_ += delta / self.n_
+            self.var_ += delta * (item - self.mean_)
+        else:
+            # Replace the removed item by the new one
+            mean = self.mean_ + (item - removed) / self.n_
+            self.var_ += (item - removed) * (item - mean + removed - self.mean_)
+            self.mean_ = mean
+
+        self._count_updates(1)
+
+    def _fit_array(self, array):
+        if not len(array):
+            return None
+        removed = self.buffer_.extend(array)
+        if len(array) >= self.n:
+            self._count_updates(self.n)
+            return None
+
+        self._combine(len(array), *_sum_of_squares(array))
+        if len(removed):
+            mean, var = _sum_of_squares(removed)
+            self._combine(-len(removed), mean, -var)
+        self._count_updates(len(array))
+
+    def _combine(self, n, mean, var):
+        """
+        Fold the count, mean and sum of squared deviations of another batch
+        into the state, using the pairwise update by Chan et al. A batch is
+        removed by giving a negative count and sum of squared deviations.
+        """
+        n_a, n_total = self.n_, self.n_ + n
+        delta = mean - self.mean_
+        self.var_ += var + delta ** 2 * (n_a * n / n_total)
+        self.n_ = n_total
+        self.mean_ += delta * (n / n_total)
+
+    def _count_updates(self, updates):
+        """
+        Recompute the state exactly from the window once every `n` updates.
+        """
+        self.updates_ += updates
+        if self.updates_ >= self.n:
+            self.n_ = len(self.buffer_)
+            self.mean_, self.var_ = _sum_of_squares(self.buffer_.array[: self.n_])
+            self.updates_ = 0
+
+    def merge(self, other):
+        """
+        Fit the items in the window of `other`, which updates the moments.
+        """
+        self._check_mergeable(other, "n")
+        self._fit_array(other.buffer_.window())
+        return self
+
+    def evaluate(self):
+        return self.var_ / self.n_
+
+
+def _sum_of_squares(array):
+    """
+    Return the mean and the sum of squared deviations from the mean.
+    """
+    mean = array.mean().item()
+    deviations = array - mean
+    return mean, np.dot(deviations, deviations).item()
+
+
+class WindowedCentralMoments(OnlineStatistic):
+    """
+    Windowed central moments up to order `order_max`.
+
+    The sums of powers of deviations from the mean are stored together with
+    the count, as in `CentralMoments`. A new item is added with the pairwise
+    update by Pébay et al., and the item it pushes out of the window is
+    removed by combining with its negated moments. The moments are recomputed
+    exactly from the window once every `n` items, to bound the cancellation
+    error of the removals. Arrays advance the window in one step.
+
+    Parameters
+    ----------
+    n : int
+        The length of the window.
+    order_max : int
+        The highest order of the moments.
+
+    Examples
+    --------
+    >>> data = [3, 8, 5, 1, 9, 3]
+    >>> moments = WindowedCentralMoments(n=3, order_max=3)
+    >>> for moment in moments.yield_from(data):
+    ...   print(round(moment[2], 8), round(moment[3], 8))
+    0.0 0.0
+    12.5 0.0
+    12.66666667 6.22222222
+    24.66666667 -12.22222222
+    32.0 0.0
+    34.66666667 62.22222222
+
+    Arrays advance the window by all their items at once.
+
+    >>> import numpy as np
+    >>> moments = WindowedCentralMoments(n=3, order_max=3)
+    >>> moments = moments.fit(np.array(data)).evaluate()
+    >>> print(round(moments[2], 8), round(moments[3], 8))
+    34.66666667 62.22222222
+    """
+
+    def __init__(self, n=10, order_max=2):
+        self.n = n
+        self.order_max = order_max
+        self.mean_ = 0.0
+        self.updates_ = 0
+        self.buffer_ = _RingBuffer(n)
+
+        # The count is stored in position 0, and position 1 is always 0
+        self.moments_ = np.zeros(order_max + 1)
+        self.item_moments_ = np.zeros(order_max + 1)
+        self.item_moments_[0] = 1
+
+    def _fit_item(self, item):
+        removed = self.buffer_.append(item)
+        self._combine(item, self.item_moments_)
+        if removed is not None:
+            self._combine(removed, -self.item_moments_)
+
+        self._count_updates(1)
+
+    def _fit_array(self, array):
+        if not len(array):
+            return None
+        removed = self.buffer_.extend(array)
+        if len(array) >= self.n:
+            self._count_updates(self.n)
+            return None
+
+        self._combine(*_central_moments(array, self.order_max))
+        if len(removed):
+            mean, moments = _central_moments(removed, self.order_max)
+            self._combine(mean, -moments)
+        self._count_updates(len(array))
+
+    def _combine(self, mean, moments):
+        self.mean_, self.moments_ = _combine_central_moments(
+            self.mean_, self.moments_, mean, moments
+        )
+
+    def _count_updates(self, updates):
+        """
+        Recompute the state exactly from the window once every `n` updates.
+        """
+        self.updates_ += updates
+        if self.updates_ >= self.n:
+            window = self.buffer_.array[: len(self.buffer_)]
+            self.mean_, self.moments_ = _central_moments(window, self.order_max)
+            self.updates_ = 0
+
+    def merge(self, other):
+        """
+        Fit the items in the window of `other`, which updates the moments of
+        every order.
+        """
+        self._check_mergeable(other, "n", "order_max")
+        self._fit_array(other.buffer_.window())
+        return self
+
+    def evaluate(self):
+        orders = range(2, self.order_max + 1)
+        return dict(zip(orders, self.moments_[2:].tolist()))
+
+
+class _MonotonicQueue:
+    """
+    The items in a window over the last `n` items which are larger than all
+    later items in the window, stored as (number, item) in a deque. The first
+    item is the maximum of the window. If `minimum` is True, the items are
+    smaller than all later items, and the first item is the minimum.
+
+    Every item is appended and removed at most once, so the amortized cost of
+    appending an item is O(1).
+    """
+
+    def __init__(self, n, minimum=False):
+        self.n = n
+        self.minimum = minimum
+        self.seen_items = 0
+        self.deque = collections.deque([])
+
+    def __bool__(self):
+        return bool(self.deque)
+
+    def append(self, item):
+        deque = self.deque
+
+        # Remove the items which can never again be the maximum (or minimum)
+        if self.minimum:
+            while deque and deque[-1][1] >= item:
+                deque.pop()
+        else:
+            while deque and deque[-1][1] <= item:
+                deque.pop()
+
+        self.seen_items += 1
+        deque.append((self.seen_items, item))
+
+        # Remove the first item if it is no longer in the window
+        if deque[0][0] <= self.seen_items - self.n:
+            deque.popleft()
+
+    def extend(self, array):
+        """
+        Append an array of items. Only the last `n` items of the array can be
+        in the window, and they are filtered together with the current queue.
+        """
+        tail = array[-self.n :]
+        numbers = np.arange(len(tail)) + (self.seen_items + len(array) - len(tail) + 1)
+        self._rebuild(numbers, tail, len(array))
+
+    def merge(self, other):
+        """
+        Append the queue of a window over the items following this window.
+        """
+        numbers = np.array([number for (number, item) in other.deque], dtype=int)
+        items = np.array([item for (number, item) in other.deque])
+        self._rebuild(numbers + self.seen_items, items, other.seen_items)
+
+    def _rebuild(self, numbers, items, num_appended):
+        """
+        Rebuild the queue from the current queue and the given new items, after
+        `num_appended` items have been appended.
+        """
+        self.seen_items += num_appended
+        deque = self.deque
+        while deque and deque[0][0] <= self.seen_items - self.n:
+            deque.popleft()
+
+        if deque:
+            numbers = np.concatenate(([number for (number, item) in deque], numbers))
+            items = np.concatenate(([item for (number, item) in deque], items))
+
+        # Keep the items larger (or smaller) than all later items
+        keep = np.ones(len(items), dtype=bool)
+        if self.minimum:
+            later = np.minimum.accumulate(items[::-1])[::-1]
+            keep[:-1] = items[:-1] < later[1:]
+        else:
+            later = np.maximum.accumulate(items[::-1])[::-1]
+            keep[:-1] = items[:-1] > later[1:]
+
+        kept = zip(numbers[keep].astype(int).tolist(), items[keep].tolist())
+        self.deque = collections.deque(kept)
+
+    def first(self):
+        return self.deque[0][1]
+
+
+class WindowedMax(OnlineStatistic):
+    """
+    A windowed maximum.
+
+    The items which may become the maximum of the window are kept in a
+    monotonic queue, so the amortized cost per item is O(1). Arrays advance
+    the window by all their items at once, using vectorized suffix maxima.
+
+    Parameters
+    ----------
+    n : int
+        The length of the window.
+
+    Examples
+    --------
+    >>> for maximum in WindowedMax(n=3).yield_from([4, 2, 3, 1, 0, 5]):
+    ...   print(maximum)
+    4
+    4
+    4
+    3
+    3
+    5
+    >>> import numpy as np
+    >>> WindowedMax(n=3).fit(np.array([4, 2, 3, 1, 0])).evaluate()
+    3
+    """
+
+    def __init__(self, n=10):
+        self.n = n
+        self.queue_ = _MonotonicQueue(n)
+
+    def _fit_item(self, item):
+        self.queue_.append(item)
+
+    def _fit_array(self, array):
+        if len(array):
+            self.queue_.extend(array)
+
+    def merge(self, other):
+        """
+        Append the queue of maxima of `other` to the queue of this window.
+        """
+        self._check_mergeable(other, "n")
+        self.queue_.merge(other.queue_)
+        return self
+
+    def evaluate(self):
+        return self.queue_.first() if self.queue_ else -float("inf")
+
+
+class WindowedMin(OnlineStatistic):
+    """
+    A windowed minimum.
+
+    The items which may become the minimum of the window are kept in a
+    monotonic queue, so the amortized cost per item is O(1). Arrays advance
+    the window by all their items at once, using vectorized suffix minima.
+
+    Parameters
+    ----------
+    n : int
+        The length of the window.
+
+    Examples
+    --------
+    >>> for minimum in WindowedMin(n=2).yield_from([4, 2, 3, 5, 1]):
+    ...   print(minimum)
+    4
     2
+    2
+    3
+    1
     """
 
     def __init__(self, n=10):
         self.n = n
-        self.window_length_ = 0
-        self.sum_ = 0
-        self.deque_ = collections.deque([])
+        self.queue_ = _MonotonicQueue(n, minimum=True)
 
     def _fit_item(self, item):
-        self.window_length_ = min(self.window_length_ + 1, self.n)
+        self.queue_.append(item)
 
-        # Add the new value
-        self.deque_.append(item)
-        self.sum_ += item
+    def _fit_array(self, array):
+        if len(array):
+            self.queue_.extend(array)
 
-        # Remove the past value
-        if len(self.deque_) > self.n:
-            removed = self.deque_.popleft()
-            self.sum_ -= removed
+    def merge(self, other):
+        """
+        Append the queue of minima of `other` to the queue of this window.
+        """
+        self._check_mergeable(other, "n")
+        self.queue_.merge(other.queue_)
+        return self
+
+    def evaluate(self):
+        return self.queue_.first() if self.queue_ else float("inf")
+
+
+class WindowedRange(OnlineStatistic):
+    """
+    A windowed range, i.e. the windowed maximum minus the windowed minimum.
+
+    Parameters
+    ----------
+    n : int
+        The length of the window.
+
+    Examples
+    --------
+    >>> for spread in WindowedRange(n=2).yield_from([4, 2, 3, 5, 1]):
+    ...   print(spread)
+    0
+    2
+    1
+    2
+    4
+    """
+
+    def __init__(self, n=10):
+        self.n = n
+        self.max_queue_ = _MonotonicQueue(n)
+        self.min_queue_ = _MonotonicQueue(n, minimum=True)
+
+    def _fit_item(self, item):
+        self.max_queue_.append(item)
+        self.min_queue_.append(item)
+
+    def _fit_array(self, array):
+        if len(array):
+            self.max_queue_.extend(array)
+            self.min_queue_.extend(array)
+
+    def merge(self, other):
+        """
+        Append the queues of maxima and minima of `other` to those of this window.
+        """
+        self._check_mergeable(other, "n")
+        self.max_queue_.merge(other.max_queue_)
+        self.min_queue_.merge(other.min_queue_)
+        return self
 
     def evaluate(self):
-        return self.sum_ / self.window_length_
+        if not self.max_queue_:
+            return -float("inf")
+        return self.max_queue_.first() - self.min_queue_.first()
+
+
+class _End:
+    """
+    A sentinel which compares greater than every item.
+    """
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return False
+
+
+class _Node:
+    __slots__ = "value", "next", "width"
+
+    def __init__(self, value, next, width):
+        self.value, self.next, self.width = value, next, width
+
+
+_NIL = _Node(_End(), [], [])
+
+
+class _IndexableSkiplist:
+    """
+    A sorted collection with O(log n) insertion, removal and indexing.
+
+    Every node stores the number of items skipped by each of its links, so
+    the item at a given index is found by walking down the levels. Levels are
+    added as the collection grows, so no expected size is needed.
+
+    Adapted from the running median recipe by Raymond Hettinger, see
+    http://code.activestate.com/recipes/576930/
+
+    Examples
+    --------
+    >>> skiplist = _IndexableSkiplist(random_state=42)
+    >>> for item in [5, 1, 4, 1, 3]:
+    ...   skiplist.insert(item)
+    >>> skiplist.remove(4)
+    >>> list(skiplist), skiplist[2]
+    ([1, 1, 3, 5], 3)
+    """
+
+    def __init__(self, random_state=None):
+        self.size = 0
+        self.levels = 1
+        self.head = _Node("HEAD", [_NIL], [1])
+        # One random number is needed per insertion, so few are buffered
+        self._uniform = _UniformBuffer(np.random.default_rng(random_state), size=64)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        node = self.head.next[0]
+        while node is not _NIL:
+            yield node.value
+            node = node.next[0]
+
+    def __getitem__(self, index):
+        node = self.head
+        index += 1
+        for level in reversed(range(self.levels)):
+            while node.width[level] <= index:
+                index -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def insert(self, value):
+        if value != value:
+            raise ValueError("NaN can not be inserted, since it is not ordered.")
+        if 2 ** self.levels <= self.size:
+            self.head.next.append(_NIL)
+            self.head.width.append(self.size + 1)
+            self.levels += 1
+
+        # Find the last node before the value on every level
+        chain = [None] * self.levels
+        steps_at_level = [0] * self.levels
+        node = self.head
+        for level in reversed(range(self.levels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        # Link the new node on a geometrically distributed number of levels
+        depth = min(self.levels, 1 - int(math.log2(1.0 - self._uniform())))
+        new_node = _Node(value, [None] * depth, [None] * depth)
+        steps = 0
+        for level in range(depth):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(depth, self.levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value):
+        # Find the last node before the value on every level
+        chain = [None] * self.levels
+        node = self.head
+        for level in reversed(range(self.levels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+        if value != chain[0].next[0].value:
+            raise KeyError(value)
+
+        # Unlink the node on every level it is linked on
+        depth = len(chain[0].next[0].next)
+        for level in range(depth):
+            previous = chain[level]
+            previous.width[level] += previous.next[level].width[level] - 1
+            previous.next[level] = previous.next[level].next[level]
+        for level in range(depth, self.levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def quantile(self, q):
+        """
+        Return the q-th quantile of the items, interpolating linearly between
+        the closest ranks. If `q` is a sequence, return a list of quantiles.
+        """
+        if not isinstance(q, numbers.Number):
+            return [self.quantile(q_i) for q_i in q]
+        if not 0 <= q <= 1:
+            raise ValueError(f"The `q` must be in the interval [0, 1], got {q!r}.")
+        if not self.size:
+            return float("nan")
+
+        position = (self.size - 1) * q
+        lower = int(position)
+        value = self[lower]
+        if lower + 1 < self.size and position > lower:
+            value += (self[lower + 1] - value) * (position - lower)
+        return value
+
+
+class RunningMedian(OnlineStatistic):
+    """
+    The running median, or other quantiles, of all items seen so far.
+
+    The items are kept in an indexable skiplist, so every item is inserted in
+    O(log n) time, and any quantile is found in O(log n) time. Quantiles are
+    interpolated linearly, as by `numpy.quantile`.
+
+    Parameters
+    ----------
+    random_state : int or np.random.Generator
+        Seeds the levels of the skiplist. Results do not depend on it.
+
+    Examples
+    --------
+    >>> for median in RunningMedian().yield_from([5, 1, 4, 2, 3]):
+    ...   print(median)
+    5
+    3.0
+    4
+    3.0
+    3
+
+    Other quantiles are evaluated from the same structure.
+
+    >>> RunningMedian().fit([5, 1, 4, 2, 3]).evaluate(q=[0.1, 0.9])
+    [1.4, 4.6]
+
+    Quantiles outside of the interval [0, 1] are rejected.
+
+    >>> RunningMedian().fit([5, 1, 4]).evaluate(q=-0.5)
+    Traceback (most recent call last):
+    ...
+    ValueError: The `q` must be in the interval [0, 1], got -0.5.
+    >>> RunningMedian().fit([5, 1, 4]).evaluate(q=[0.5, 1.5])
+    Traceback (most recent call last):
+    ...
+    ValueError: The `q` must be in the interval [0, 1], got 1.5.
+    """
+
+    def __init__(self, random_state=None):
+        self.random_state = random_state
+        self.skiplist_ = _IndexableSkiplist(random_state)
+
+    def _fit_item(self, item):
+        self.skiplist_.insert(item)
+
+    def _fit_array(self, array):
+        for item in array.tolist():
+            self.skiplist_.insert(item)
+
+    def merge(self, other):
+        self._check_mergeable(other)
+        for item in other.skiplist_:
+            self.skiplist_.insert(item)
+        return self
+
+    def evaluate(self, q=0.5):
+        """
+        Return the q-th quantile, or a list of quantiles if `q` is a sequence.
+        """
+        return self.skiplist_.quantile(q)
+
+
+class WindowedQuantile(OnlineStatistic):
+    """
+    Windowed quantiles.
+
+    The items in the window are kept both in arrival order, and sorted in an
+    indexable skiplist. Every new item is inserted and the oldest item is
+    removed in O(log n) time, and every quantile is found in O(log n) time.
+    Quantiles are interpolated linearly, as by `numpy.quantile`.
+
+    Parameters
+    ----------
+    q : float or sequence of floats
+        The quantiles to evaluate, between 0 and 1.
+    n : int
+        The length of the window.
+    random_state : int or np.random.Generator
+        Seeds the levels of the skiplist. Results do not depend on it.
+
+    Examples
+    --------
+    >>> for median in WindowedQuantile(q=0.5, n=3).yield_from([5, 1, 4, 2, 3]):
+    ...   print(median)
+    5
+    3.0
+    4
+    2
+    3
+
+    Several quantiles are evaluated from the same structure.
+
+    >>> import numpy as np
+    >>> latencies = WindowedQuantile(q=[0.5, 0.99], n=100)
+    >>> latencies.fit(np.arange(1000)).evaluate()
+    [949.5, 998.01]
+
+    NaN has no rank, so it is rejected.
+
+    >>> latencies.fit(float("nan"))
+    Traceback (most recent call last):
+    ...
+    ValueError: NaN can not be inserted, since it is not ordered.
+    """
+
+    def __init__(self, q=0.5, n=10, random_state=None):
+        self.q = q
+        self.n = n
+        self.random_state = random_state
+        self.window_ = collections.deque([])
+        self.skiplist_ = _IndexableSkiplist(random_state)
+
+    def _fit_item(self, item):
+        self.skiplist_.insert(item)
+        self.window_.append(item)
+        if len(self.window_) > self.n:
+            self.skiplist_.remove(self.window_.popleft())
+
+    def _fit_array(self, array):
+        # Items pushed out by later items of the array are never inserted
+        for item in array[-self.n :].tolist():
+            self._fit_item(item)
+
+    def merge(self, other):
+        """
+        Insert the items in the window of `other`, evicting the oldest items.
+        """
+        self._check_mergeable(other, "n")
+        for item in other.window_:
+            self._fit_item(item)
+        return self
+
+    def evaluate(self, q=None):
+        """
+        Return the quantiles given by `q`, which defaults to those given when
+        the statistic was created.
+        """
+        return self.skiplist_.quantile(self.q if q is None else q)
 
 
 class WindowedSample(OnlineStatistic):
@@ -59,21 +936,23 @@ class WindowedSample(OnlineStatistic):
 
     Examples
     --------
-    >>> import random
-    >>> random.seed(123)  # The algorithm is stochastic. Seed to reproduce.
     >>> stream = iter([5, 2, 3, 7, 4])
-    >>> sampler = WindowedSample(num_samples=2)
+    >>> sampler = WindowedSample(num_samples=2, random_state=123)
     >>> for sample in sampler.yield_from(stream):
     ...   print(sample)
     [5]
     [5, 2]
-    [3, 2]
-    [3, 2]
-    [4, 2]
+    [5, 2]
+    [5, 7]
+    [5, 4]
     """
 
-    def __init__(self, num_samples=10):
+    def __init__(self, num_samples=10, random_state=None):
         self.num_samples = num_samples
+        self.random_state = random_state
+        self.seed_sequence_ = _seed_sequence(random_state)
+        self.generator_ = np.random.default_rng(self.seed_sequence_ or random_state)
+        self._uniform = _UniformBuffer(self.generator_)
         self.seen_items_ = 0
         self.samples = []
 
@@ -83,18 +962,44 @@ class WindowedSample(OnlineStatistic):
         # If the reservoir is not filled up yet, append the item to the list
         if len(self.samples) < self.num_samples:
             self.samples.append(item)
-            # print(f'added, looks like {self.samples}')
         else:
             # Generate a random index to possibly insert into
-            random_index = random.randrange(self.seen_items_)
-            # print(f'Generated {random_index} range({0}, {self.i_ + 1})')
-            # print(f'keeping if {random_index} < {self.n}')
+            random_index = int(self._uniform() * self.seen_items_)
             # If the generated value is lower enough, accept the item
             if random_index < self.num_samples:
-                # Keep it
-                # print(' keeping it')
                 self.samples[random_index] = item
 
+    def merge(self, other):
+        self._check_mergeable(other, "num_samples")
+        self.samples = _merge_reservoirs(
+            self.samples,
+            self.seen_items_,
+            other.samples,
+            other.seen_items_,
+            self.num_samples,
+            self.generator_,
+        )
+        self.seen_items_ += other.seen_items_
+        return self
+
+    def spawn(self, n):
+        """
+        Return `n` new samplers with independent random streams, spawned from
+        the seed sequence of this sampler, as by `Sample.spawn`.
+
+        Examples
+        --------
+        >>> shards = WindowedSample(num_samples=2, random_state=42).spawn(2)
+        >>> shards[0].fit([1, 2, 3, 4, 5]).evaluate()
+        [3, 2]
+        >>> shards[0].merge(shards[1].fit([6, 7, 8, 9, 10])).evaluate()
+        [10, 6]
+        """
+        return [
+            type(self)(self.num_samples, child)
+            for child in _spawn_seed_sequences(self.seed_sequence_, self.generator_, n)
+        ]
+
     def evaluate(self):
         return self.samples
 
@@ -103,36 +1008,351 @@ class WindowedWeightedMean(OnlineStatistic):
     """
     A windowed weighted mean.
 
+    The weights decay geometrically by a factor `k` from the newest item to
+    the oldest item in a window of length `n`. The newest item has weight one,
+    and the weight k^(1 - n) of the oldest item is computed once, in log
+    space, so long windows do not overflow. When that weight is below the
+    smallest float it is zero, which is exact to float precision. The factor
+    `k` must be at least 1. For weights decaying over the entire stream in
+    constant memory, see ExponentialMean.
+
     Examples
     --------
-    >>> 1 + 1
-    2
+    >>> for mean in WindowedWeightedMean(n=2, k=2).yield_from([3, 6, 9]):
+    ...   print(mean)
+    3.0
+    5.0
+    8.0
+
+    Long windows are supported, since the weights never exceed one.
+
+    >>> mean = WindowedWeightedMean(n=2000, k=1.5).fit(range(5000))
+    >>> round(mean.evaluate(), 6)
+    4997.0
+    >>> WindowedWeightedMean(n=2000, k=0.5)
+    Traceback (most recent call last):
+    ...
+    ValueError: The `k` must be at least 1.
     """
 
     def __init__(self, n=10, k=2):
+        if not k >= 1:
+            raise ValueError("The `k` must be at least 1.")
         self.n = n
         self.k = k
         self.window_length_ = 0
         self.sum_ = 0
         self.deque_ = collections.deque([])
 
-    def _fit_item(self, item):
-        self.window_length_ = min(self.window_length_ + 1, self.n)
+        # The weight of the oldest item in a full window
+        self.tail_weight_ = math.exp((1 - n) * math.log(k))
 
-        # Remove the past value
+    def _fit_item(self, item):
+        # Remove the past value, which has weight k^(1 - n)
         if len(self.deque_) >= self.n:
             removed = self.deque_.popleft()
-            self.sum_ -= removed
-            self.sum_ /= self.k
+            self.sum_ -= removed * self.tail_weight_
 
-        # Add the new value
+        # Decay the weights, and add the new value
         self.deque_.append(item)
-        self.sum_ += item * self.k ** (self.window_length_ - 1)
+        self.sum_ = self.sum_ / self.k + item
+        self.window_length_ = len(self.deque_)
+
+    def merge(self, other):
+        """
+        Fit the items in the window of `other`, decaying the weights.
+        """
+        self._check_mergeable(other, "n", "k")
+        self_fit_item = self._fit_item
+        for item in other.deque_:
+            self_fit_item(item)
+        return self
+
+    def evaluate(self):
+        if self.k == 1:
+            return self.sum_ / self.window_length_
+
+        # The sum of the weights 1, 1/k, ..., k^(1 - window_length_)
+        decay = 1 / self.k
+        sum_weights = -math.expm1(self.window_length_ * math.log(decay))
+        return self.sum_ * (1 - decay) / sum_weights
+
+
+def _decay_rate(alpha, halflife):
+    """
+    Return the decay rate `alpha`, given either `alpha` or a `halflife`.
+
+    Examples
+    --------
+    >>> _decay_rate(alpha=0.5, halflife=None)
+    0.5
+    >>> _decay_rate(alpha=None, halflife=1)
+    0.5
+    """
+    if (alpha is None) == (halflife is None):
+        raise ValueError("Exactly one of `alpha` and `halflife` must be given.")
+
+    if halflife is not None:
+        if not halflife > 0:
+            raise ValueError("The `halflife` must be positive.")
+        return -math.expm1(-math.log(2) / halflife)
+
+    if not 0 < alpha <= 1:
+        raise ValueError("The `alpha` must be in the interval (0, 1].")
+    return alpha
+
+
+def _geometric_weights(alpha, m):
+    """
+    Return the weights alpha * (1 - alpha)^(m - 1 - i) of m items, i.e. the
+    weights of the items after fitting all of them, oldest first.
+    """
+    return alpha * (1 - alpha) ** np.arange(m - 1, -1, -1, dtype=float)
+
+
+class ExponentialMean(OnlineStatistic):
+    """
+    An exponentially weighted mean.
+
+    Every new item gets weight `alpha`, and the weights of the previous items
+    decay by a factor (1 - alpha). The first item initializes the mean. Only
+    the mean is stored, and arrays are fitted using the closed form sum of the
+    geometric weights.
+
+    Parameters
+    ----------
+    alpha : float
+        The decay rate, in the interval (0, 1].
+    halflife : float
+        The number of items for the weights to decay by half. Exactly one of
+        `alpha` and `halflife` must be given.
+
+    Examples
+    --------
+    >>> for mean in ExponentialMean(alpha=0.5).yield_from([1, 3, 3, 3]):
+    ...   print(mean)
+    1.0
+    2.0
+    2.5
+    2.75
+
+    Sequential results for arrays are computed with a linear filter.
+
+    >>> ExponentialMean(halflife=1).return_from([1, 3, 3, 3], as_array=True)
+    array([1.  , 2.  , 2.5 , 2.75])
+    """
+
+    def __init__(self, alpha=None, halflife=None):
+        self.alpha = _decay_rate(alpha, halflife)
+        self.halflife = halflife
+        self.n_ = 0
+        self.mean_ = 0.0
+
+    def _fit_item(self, item):
+        alpha = self.alpha if self.n_ else 1.0
+        self.n_ += 1
+        self.mean_ += alpha * (item - self.mean_)
+
+    def _fit_array(self, array):
+        if not self.n_ and len(array):
+            self._fit_item(array[0].item())
+            array = array[1:]
+
+        weights = _geometric_weights(self.alpha, len(array))
+        self.mean_ += np.dot(weights, array - self.mean_).item()
+        self.n_ += len(array)
+
+    def _return_array(self, array):
+        if not self.n_ and len(array):
+            first = float(array[0])
+            self._fit_item(first)
+            return np.concatenate(([first], self._return_array(array[1:])))
+
+        # The deviations from the current mean follow the recursion
+        # y[i] = (1 - alpha) * y[i - 1] + alpha * x[i], starting from zero
+        alpha = self.alpha
+        means = self.mean_ + signal.lfilter([alpha], [1, alpha - 1], array - self.mean_)
+        if len(array):
+            self.mean_ = means[-1].item()
+            self.n_ += len(array)
+        return means
+
+    def evaluate(self):
+        return self.mean_
+
+
+class ExponentialVariance(OnlineStatistic):
+    """
+    An exponentially weighted variance.
+
+    The weights are the same as in ExponentialMean. The mean and variance are
+    updated using the incremental formulas by Finch, and arrays are fitted
+    using weighted sums of deviations from the current mean.
+
+    Parameters
+    ----------
+    alpha : float
+        The decay rate, in the interval (0, 1].
+    halflife : float
+        The number of items for the weights to decay by half. Exactly one of
+        `alpha` and `halflife` must be given.
+
+    Examples
+    --------
+    >>> for var in ExponentialVariance(alpha=0.5).yield_from([1, 3, 3, 3]):
+    ...   print(var)
+    0.0
+    1.0
+    0.75
+    0.4375
+    >>> ExponentialVariance(alpha=0.5).return_from([1, 3, 3, 3], as_array=True)
+    array([0.    , 1.    , 0.75  , 0.4375])
+    """
+
+    def __init__(self, alpha=None, halflife=None):
+        self.alpha = _decay_rate(alpha, halflife)
+        self.halflife = halflife
+        self.n_ = 0
+        self.mean_ = 0.0
+        self.var_ = 0.0
+
+    def _fit_item(self, item):
+        alpha = self.alpha if self.n_ else 1.0
+        self.n_ += 1
+        delta = item - self.mean_
+        self.mean_ += alpha * delta
+        self.var_ = (1 - alpha) * (self.var_ + alpha * delta ** 2)
+
+    def _fit_array(self, array):
+        if not self.n_ and len(array):
+            self._fit_item(array[0].item())
+            array = array[1:]
+
+        # Weighted raw moments about the current mean, including the state
+        weights = _geometric_weights(self.alpha, len(array))
+        deviations = array - self.mean_
+        decay = (1 - self.alpha) ** len(array)
+        first = np.dot(weights, deviations).item()
+        second = decay * self.var_ + np.dot(weights, deviations ** 2).item()
+
+        self.mean_ += first
+        self.var_ = max(second - first ** 2, 0.0)
+        self.n_ += len(array)
+
+    def _return_array(self, array):
+        if not self.n_ and len(array):
+            self._fit_item(array[0].item())
+            return np.concatenate(([0.0], self._return_array(array[1:])))
+
+        # Running weighted raw moments about the current mean
+        alpha = self.alpha
+        deviations = array - self.mean_
+        first = signal.lfilter([alpha], [1, alpha - 1], deviations)
+        zi = [(1 - alpha) * self.var_]
+        second, _ = signal.lfilter([alpha], [1, alpha - 1], deviations ** 2, zi=zi)
+        variances = np.maximum(second - first ** 2, 0)
+
+        if len(array):
+            self.mean_ += first[-1].item()
+            self.var_ = variances[-1].item()
+            self.n_ += len(array)
+        return variances
+
+    def evaluate(self):
+        return self.var_
+
+
+class ExponentialMoments(OnlineStatistic):
+    """
+    The exponentially weighted central moments up to order `order_max`.
+
+    The weights are the same as in ExponentialMean, and the moments are
+    weighted averages of powers of deviations from the weighted mean. Items
+    are fitted by shifting the moments to the new mean using a table of
+    binomial coefficients. Arrays are fitted by computing weighted moments
+    about the current mean with the closed form geometric weights.
+
+    Parameters
+    ----------
+    order_max : int
+        The highest order of the central moments.
+    alpha : float
+        The decay rate, in the interval (0, 1].
+    halflife : float
+        The number of items for the weights to decay by half. Exactly one of
+        `alpha` and `halflife` must be given.
+
+    Examples
+    --------
+    >>> moments = ExponentialMoments(order_max=3, alpha=0.5)
+    >>> for moment in moments.yield_from([1, 3, 3, 3]):
+    ...   print(moment)
+    {2: 0.0, 3: 0.0}
+    {2: 1.0, 3: 0.0}
+    {2: 0.75, 3: -0.75}
+    {2: 0.4375, 3: -0.65625}
+    >>> import numpy as np
+    >>> ExponentialMoments(order_max=3, alpha=0.5).fit(np.array([1, 3, 3, 3])).evaluate()
+    {2: 0.4375, 3: -0.65625}
+    """
+
+    def __init__(self, order_max=2, alpha=None, halflife=None):
+        self.order_max = order_max
+        self.alpha = _decay_rate(alpha, halflife)
+        self.halflife = halflife
+        self.n_ = 0
+        self.mean_ = 0.0
+
+        # The weighted average of the zeroth power is 1, and of the first is 0
+        self.moments_ = np.zeros(order_max + 1)
+        self.moments_[0] = 1
+
+    def _fit_item(self, item):
+        alpha = self.alpha if self.n_ else 1.0
+        self.n_ += 1
+        delta = item - self.mean_
+        self.mean_ += alpha * delta
+
+        # Shift the moments of the previous items to the new mean, and weight
+        # them together with the moments of the new item
+        binomial, index = _pascal_matrix(self.order_max)
+        orders = index[:, 0]
+        shifted = (binomial * self.moments_[index]) @ ((-alpha * delta) ** orders)
+        moments = (1 - alpha) * shifted + alpha * ((1 - alpha) * delta) ** orders
+        moments[0], moments[1] = 1, 0
+        self.moments_ = moments
+
+    def _fit_array(self, array):
+        if not self.n_ and len(array):
+            self._fit_item(array[0].item())
+            array = array[1:]
+        if not len(array):
+            return None
+
+        # Weighted raw moments about the current mean, including the state
+        binomial, index = _pascal_matrix(self.order_max)
+        orders = index[:, 0]
+        weights = _geometric_weights(self.alpha, len(array))
+        deviations = array - self.mean_
+        raw = (1 - self.alpha) ** len(array) * self.moments_
+        raw[0] = 1
+        powers = np.ones_like(deviations)
+        for order in orders[1:]:
+            powers *= deviations
+            raw[order] += np.dot(weights, powers)
+
+        # Central moments about the new mean
+        shift = raw[1]
+        moments = (binomial * raw[index]) @ ((-shift) ** orders)
+        moments[0], moments[1] = 1, 0
+
+        self.moments_ = moments
+        self.mean_ += shift
+        self.n_ += len(array)
 
     def evaluate(self):
-        # print(self.sum_, self.window_length_)
-        sum_weights = (self.k ** (self.window_length_) - 1) / (self.k - 1)
-        return self.sum_ / sum_weights
+        orders = range(2, self.order_max + 1)
+        return dict(zip(orders, self.moments_[2:].tolist()))
 
 
 def main():
@@ -156,7 +1376,7 @@ if __name__ == "__main__":
     print("------")
     random.seed(123_456)
     items = list([random.randrange(10) for i in range(1_000_000)])
-    sm = WindowedSample(num_samples=1000)
+    sm = WindowedSample(num_samples=1000, random_state=123_456)
     import statistics
 
     for counter, i in enumerate(items):